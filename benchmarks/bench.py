@@ -0,0 +1,256 @@
+"""Benchmarks of `check_type` and `into` across schema shapes
+
+Run `make bench` (or `python benchmarks/bench.py`) to print results as JSON.
+`--save` stores them as the baseline (`benchmarks/baseline.json` by default), and later runs
+compare against it, exiting with 1 if any case got slower than `--threshold` times the baseline.
+
+The committed baseline was recorded on the tree before compiled plans were introduced
+(`PYTHONPATH=<old tree> python benchmarks/bench.py --save`), so that runs show the speedup.
+Cases which the installed version can't run, or APIs it lacks, are skipped.
+"""
+
+import argparse
+import dataclasses
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from typing_extensions import Literal, TypedDict
+
+import dataclass_utils
+from dataclass_utils import check_type, into
+from dataclass_utils.type_checker import check
+
+# so that the same cases can be run against older releases for the baseline
+try:
+    from dataclass_utils import compile_into
+except ImportError:  # pragma: no cover
+    compile_into = None  # type: ignore
+try:
+    from dataclass_utils import loads_into
+except ImportError:  # pragma: no cover
+    loads_into = None  # type: ignore
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+@dataclasses.dataclass
+class Flat:
+    a: int
+    b: str
+    c: float
+    d: bool
+    e: Optional[int]
+    f: List[int]
+    g: Dict[str, str]
+    h: Literal["x", "y", "z"]
+
+
+FLAT = {
+    "a": 1,
+    "b": "foo",
+    "c": 1.5,
+    "d": True,
+    "e": None,
+    "f": [1, 2, 3],
+    "g": {"k": "v"},
+    "h": "y",
+}
+
+
+@dataclasses.dataclass
+class Deep:
+    value: int
+    child: Optional["Deep"] = None
+
+
+def deep_data(depth: int) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"value": 0}
+    for i in range(depth):
+        data = {"value": i, "child": data}
+    return data
+
+
+WideUnion = Union[
+    int, float, bytes, Tuple[int, int], Dict[str, int], List[str], str, None
+]
+
+
+@dataclasses.dataclass
+class Wide:
+    values: List[WideUnion]
+
+
+WIDE = {"values": ["a", None, [1, 2], "b", ["x"], b"z"] * 20}
+
+
+@dataclasses.dataclass
+class EventA:
+    kind: Literal["a"]
+    x: int
+
+
+@dataclasses.dataclass
+class EventB:
+    kind: Literal["b"]
+    y: str
+
+
+@dataclasses.dataclass
+class Events:
+    events: List[Union[EventA, EventB]]
+
+
+EVENTS = {"events": [{"kind": "a", "x": 1}, {"kind": "b", "y": "s"}] * 50}
+
+
+@dataclasses.dataclass
+class Large:
+    ints: List[int]
+    table: Dict[str, float]
+
+
+LARGE = {
+    "ints": list(range(100_000)),
+    "table": {str(i): float(i) for i in range(10_000)},
+}
+
+
+class Point(TypedDict):
+    x: int
+    y: int
+    label: Optional[str]
+
+
+@dataclasses.dataclass
+class Shapes:
+    points: List[Point]
+
+
+SHAPES = {"points": [{"x": i, "y": i, "label": None} for i in range(100)]}
+
+
+@dataclasses.dataclass
+class Tuples:
+    pairs: List[Tuple[int, str, float]]
+    seq: Tuple[int, ...]
+
+
+TUPLES = {"pairs": [(i, "s", 1.0) for i in range(100)], "seq": tuple(range(1000))}
+
+
+def cases() -> Dict[str, Callable[[], Any]]:
+    deep = deep_data(100)
+    # `into` doesn't support TypedDict, so it is only checked
+    shapes = Shapes(**SHAPES)
+    ret: Dict[str, Callable[[], Any]] = {}
+    for name, kls, data in [
+        ("flat", Flat, FLAT),
+        ("deep", Deep, deep),
+        ("wide_union", Wide, WIDE),
+        ("tagged_union", Events, EVENTS),
+        ("large_containers", Large, LARGE),
+        ("tuples", Tuples, TUPLES),
+    ]:
+        ret[f"into/{name}"] = lambda data=data, kls=kls: into(data, kls)
+        ret[f"check/{name}"] = lambda data=data, kls=kls: check_type(
+            value_of(data, kls)
+        )
+    if compile_into is not None:
+        flat_codegen = compile_into(Flat, codegen=True)
+        ret["into/flat_codegen"] = lambda: flat_codegen(FLAT)
+    large_json = json.dumps(LARGE)
+    ret["into/json_loads"] = lambda: into(json.loads(large_json), Large)
+    if loads_into is not None:
+        ret["into/loads_into"] = lambda: loads_into(large_json, Large)
+    ret["check/typeddict"] = lambda: check_type(shapes)
+    ret["check/typeddict_list"] = lambda: check(SHAPES["points"], List[Point])
+    return ret
+
+
+_values: Dict[Any, Any] = {}
+
+
+def value_of(data: Dict[str, Any], kls: type) -> Any:
+    """Converts `data` once per case, so that `check` cases time only the check"""
+    key = (id(data), kls)
+    if key not in _values:
+        _values[key] = into(data, kls)
+    return _values[key]
+
+
+def measure(fn: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """Returns the best time per call in seconds"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(filter: Optional[str], min_time: float, repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name, fn in cases().items():
+        if filter is not None and filter not in name:
+            continue
+        try:
+            fn()
+        except Exception as e:
+            # e.g. types which older versions don't support
+            print(f"skipped: {name}: {type(e).__name__}: {e!s:.200}", file=sys.stderr)
+            continue
+        results[name] = measure(fn, min_time, repeat)
+    return {
+        "version": dataclass_utils.__version__,
+        "python": platform.python_version(),
+        "unit": "seconds per call",
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[Tuple[str, float]]:
+    """Returns cases slower than `threshold` times the baseline, with their ratios"""
+    ret = []
+    for name, t in current.items():
+        if name in baseline:
+            ratio = t / baseline[name]
+            if ratio > threshold:
+                ret.append((name, ratio))
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-k", "--filter", help="run cases whose name contains this")
+    parser.add_argument("-o", "--output", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="save results as baseline")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = run(args.filter, args.min_time, args.repeat)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text)
+    if args.save:
+        args.baseline.write_text(text)
+        return
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        for name, ratio in regressions:
+            msg = f"regression: {name} is {ratio:.2f}x slower than baseline"
+            print(msg, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -34,12 +34,42 @@ Recursively constructs dataclass from dict
 
 from typing import TypeVar
 
+from dataclass_utils import profile
+from dataclass_utils.aio import check_type_async, into_async
+from dataclass_utils.batch import check_many, into_many, into_many_parallel
+from dataclass_utils.cache import cache_info, clear_cache, set_cache_capacity
+from dataclass_utils.into_dataclass import compile_into
 from dataclass_utils.into_dataclass import into_root as into
+from dataclass_utils.jsonl import loads_into, read_jsonl
+from dataclass_utils.serializer import compile_from, from_dataclass, iter_json
+from dataclass_utils.type_checker import ContainerPolicy
 from dataclass_utils.type_checker import check_root as check_type
+from dataclass_utils.type_checker import set_container_policy
 
 from .VERSION import __version__
 
 T = TypeVar("T")
 
 
-__all__ = ["check_type", "__version__", "into"]
+__all__ = [
+    "check_type",
+    "__version__",
+    "into",
+    "compile_into",
+    "from_dataclass",
+    "compile_from",
+    "iter_json",
+    "into_many",
+    "into_many_parallel",
+    "check_many",
+    "check_type_async",
+    "into_async",
+    "read_jsonl",
+    "loads_into",
+    "ContainerPolicy",
+    "set_container_policy",
+    "cache_info",
+    "clear_cache",
+    "set_cache_capacity",
+    "profile",
+]
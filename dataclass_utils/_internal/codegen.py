@@ -0,0 +1,27 @@
+"""Build specialized functions from generated source, as `dataclasses` does for `__init__`."""
+
+from typing import Any, Callable, Dict, List, Type
+
+# Scalar types `t` for which `type(v) is t` proves that `v` is valid as is,
+# so that generated code can test them inline.
+INLINE_TYPES = (int, float, str, bool, bytes, type(None))
+
+
+def is_inline_type(ty: Type[Any]) -> bool:
+    return any(ty is t for t in INLINE_TYPES)
+
+
+def inline_test(var: str, ty: Type[Any], ty_name: str) -> str:
+    """Returns an expression which is true if `var` is not exactly of `ty`"""
+    if ty is type(None):
+        return f"{var} is not None"
+    return f"type({var}) is not {ty_name}"
+
+
+def make_function(
+    name: str, body: List[str], namespace: Dict[str, Any]
+) -> Callable[[Any], Any]:
+    """Executes `def name(value): body` in `namespace` and returns the function."""
+    src = f"def {name}(value):\n" + "\n".join(f"    {line}" for line in body)
+    exec(src, namespace)
+    return namespace[name]
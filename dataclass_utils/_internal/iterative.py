@@ -0,0 +1,80 @@
+"""Run compiled plans with an explicit stack, so that nesting doesn't consume Python frames.
+
+Nodes which may contain deeply nested values (e.g. dataclasses, containers of them) are
+generator functions, which yield `(step, value)` for each child and receive its result.
+Other nodes are plain functions, run as they are. Nodes may also yield slices of the items
+of large containers to plain functions, so that `run_async` can yield between slices.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import Any, Callable, Generator, List, NamedTuple, Tuple
+
+# yields (child, value), receives the child result, and returns the result
+Node = Generator[Tuple["Step", Any], Any, Any]
+NodeFn = Callable[[Any], Node]
+
+
+class Step(NamedTuple):
+    fn: Callable[[Any], Any]
+    # whether `fn` returns a `Node` generator rather than the result
+    nested: bool
+    # whether `fn` takes a list of items, each of which counts as a node in `run_async`
+    sliced: bool = False
+
+
+def run(step: Step, value: Any) -> Any:
+    """Runs `step` on `value` with constant Python stack depth"""
+    if not step.nested:
+        return step.fn(value)
+    stack: List[Node] = [step.fn(value)]
+    sent = None
+    while True:
+        try:
+            child, child_value = stack[-1].send(sent)
+        except StopIteration as e:
+            stack.pop()
+            if not stack:
+                return e.value
+            sent = e.value
+            continue
+        if child.nested:
+            stack.append(child.fn(child_value))
+            sent = None
+        else:
+            sent = child.fn(child_value)
+
+
+async def run_async(step: Step, value: Any, max_nodes: int, max_time: float) -> Any:
+    """Same as `run`, but yields to the event loop after every `max_nodes` nodes or
+    `max_time` seconds, whichever comes first.
+
+    The deadline is checked between nodes, so a single node runs to completion.
+    """
+    if not step.nested:
+        return step.fn(value)
+    stack: List[Node] = [step.fn(value)]
+    sent = None
+    nodes = 0
+    deadline = perf_counter() + max_time
+    while True:
+        nodes += 1
+        if nodes >= max_nodes or perf_counter() >= deadline:
+            await asyncio.sleep(0)
+            nodes = 0
+            deadline = perf_counter() + max_time
+        try:
+            child, child_value = stack[-1].send(sent)
+        except StopIteration as e:
+            stack.pop()
+            if not stack:
+                return e.value
+            sent = e.value
+            continue
+        if child.nested:
+            stack.append(child.fn(child_value))
+            sent = None
+        else:
+            sent = child.fn(child_value)
+            if child.sliced:
+                nodes += len(child_value)
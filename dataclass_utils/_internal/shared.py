@@ -1,7 +1,208 @@
+import array
+import collections.abc
+import dataclasses
 import sys
 import types
-from typing import Any, Type
+import typing
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from dataclass_utils.cache import WeakCache, register
+from dataclass_utils.typing import Literal, get_args, get_origin
+
+NoneType = type(None)
+
+# origins of `Sequence[X]`, whose values may be any sequences (e.g. tuples, buffers)
+SEQUENCE_ORIGINS = (collections.abc.Sequence, collections.abc.MutableSequence)
+
+# item types whose checks only depend on the exact types of items
+SCALAR_TYPES = frozenset([int, float, complex, str, bytes, bool])
+
+# one dimensional buffers, whose item types are known from their format
+BUFFER_TYPES = frozenset([array.array, memoryview, bytes, bytearray])
+
+# item types of `struct` format codes (and `array` type codes)
+_FORMAT_TYPES: Dict[str, type] = {
+    **dict.fromkeys("bBhHiIlLqQnNP", int),
+    **dict.fromkeys("efd", float),
+    "?": bool,
+    "c": bytes,
+    "u": str,
+    "w": str,
+}
 
 
 def is_pep604_union(ty: Type[Any]) -> bool:
     return sys.version_info >= (3, 10) and ty is types.UnionType  # type: ignore
+
+
+# resolved type hints, which are dropped with their classes
+_type_hints: "WeakCache[type, Dict[str, Any]]" = register("type_hints", WeakCache())
+
+
+def type_hints(kls: Type[Any]) -> Dict[str, Any]:
+    """Cached `typing.get_type_hints` for classes (e.g. dataclasses, TypedDicts).
+
+    Hints of base classes are included, and forward references are resolved.
+    The returned dict is shared, so it must not be modified.
+    """
+    try:
+        return _type_hints.get(kls)
+    except KeyError:
+        pass
+    return _type_hints.put(kls, typing.get_type_hints(kls))
+
+
+def buffer_item_type(value: Any) -> Optional[type]:
+    """Returns the type of items of a buffer whose type is in `BUFFER_TYPES`, or None if unknown
+
+    >>> buffer_item_type(array.array("d"))
+    <class 'float'>
+    >>> buffer_item_type(memoryview(b"a"))
+    <class 'int'>
+    >>> buffer_item_type(memoryview(b"ab").cast("B", (1, 2)))
+    """
+    if isinstance(value, array.array):
+        return _FORMAT_TYPES.get(value.typecode)
+    elif isinstance(value, memoryview):
+        if value.ndim != 1:
+            return None
+        # native and standard sizes both give the same item types
+        return _FORMAT_TYPES.get(value.format.lstrip("@=<>!"))
+    return int  # bytes, bytearray
+
+
+def is_opaque_buffer(value: Any) -> bool:
+    """Whether `value` is a memoryview whose items can't be iterated, e.g. a multi dimensional
+    one or one of a struct format
+
+    >>> is_opaque_buffer(memoryview(b"ab").cast("B", (1, 2)))
+    True
+    """
+    return type(value) is memoryview and buffer_item_type(value) is None
+
+
+class Discriminator(typing.NamedTuple):
+    """Field whose `Literal` type tells which member of a `Union` of dataclasses a value is"""
+
+    field: str
+    # literal value -> member
+    members: Dict[Any, Type[Any]]
+    # `Literal` of all the values, for error messages
+    ty: Any
+    # whether `None` is also a member
+    optional: bool
+
+
+def find_discriminator(union_members: Sequence[Any]) -> Optional[Discriminator]:
+    """Finds a field which is annotated with `Literal` in all the members, with no value shared
+    between members.
+
+    Returns None unless all the members but `None` are dataclasses.
+
+    >>> @dataclasses.dataclass
+    ... class A:
+    ...     kind: Literal["a"]
+    >>> @dataclasses.dataclass
+    ... class B:
+    ...     kind: Literal["b", "bb"]
+    >>> d = find_discriminator([A, B, None])
+    >>> d.field, d.members, d.optional
+    ('kind', {'a': <class '...A'>, 'b': <class '...B'>, 'bb': <class '...B'>}, True)
+    """
+    optional = any(t is None or t is NoneType for t in union_members)
+    members = [t for t in union_members if not (t is None or t is NoneType)]
+    if len(members) < 2 or not all(
+        isinstance(t, type) and dataclasses.is_dataclass(t) for t in members
+    ):
+        return None
+    try:
+        hints = [type_hints(t) for t in members]
+    except Exception:
+        # e.g. forward references which can't be resolved yet
+        return None
+    for field in hints[0]:
+        tags = _tags(field, members, hints)
+        if tags is not None:
+            values = [v for v, _ in tags]
+            table = dict(tags)
+            if len(table) == len(values):
+                return Discriminator(field, table, Literal[tuple(values)], optional)  # type: ignore
+    return None
+
+
+def _tags(
+    field: str, members: List[Type[Any]], hints: List[Dict[str, Any]]
+) -> Optional[List[Tuple[Any, Type[Any]]]]:
+    ret = []
+    for t, h in zip(members, hints):
+        ty = h.get(field)
+        if ty is None or get_origin(ty) is not Literal:
+            return None
+        for v in get_args(ty):
+            try:
+                hash(v)
+            except TypeError:
+                return None
+            ret.append((v, t))
+    return ret
+
+
+F = typing.TypeVar("F")
+
+
+def type_table(
+    members: Sequence[Tuple[Optional[Tuple[type, ...]], F]],
+) -> Dict[type, List[F]]:
+    """Builds a table from exact value types to the members which can accept them, in order.
+
+    Each member is a pair of the types which it accepts (including their subclasses),
+    or None if unknown, and the member itself.
+    Values of types which are not in the table (e.g. subclasses) may be accepted by any member.
+
+    >>> table = type_table([((int,), "int"), ((str,), "str"), (None, "any")])
+    >>> table[int], table[str]
+    (['int', 'any'], ['str', 'any'])
+    """
+    keys = {t for accepts, _ in members if accepts is not None for t in accepts}
+    return {
+        k: [m for accepts, m in members if accepts is None or _accepts(k, accepts)]
+        for k in keys
+    }
+
+
+def _accepts(k: type, accepts: Tuple[type, ...]) -> bool:
+    try:
+        return any(issubclass(k, t) for t in accepts)
+    except TypeError:
+        # e.g. TypedDicts and non runtime `Protocol`s, which can't be tested
+        return True
+
+
+def literal_test(literals: Sequence[Any]) -> typing.Callable[[Any], bool]:
+    """Returns a predicate which tells whether a value is one of `literals`, by hash lookup.
+
+    Unlike `==`, `bool` values and other values (e.g. `True` and `1`) are distinct.
+    Unhashable values are compared one by one.
+
+    >>> test = literal_test([1, "a", False])
+    >>> test(1), test("a"), test(False), test(True), test(0), test([1])
+    (True, True, True, False, False, False)
+    """
+    bools = [v for v in literals if type(v) is bool]
+    others = [v for v in literals if type(v) is not bool]
+    try:
+        bool_index, other_index = frozenset(bools), frozenset(others)
+    except TypeError:
+        # unhashable literals
+        bool_index, other_index = bools, others  # type: ignore
+
+    def test(value: Any) -> bool:
+        try:
+            if type(value) is bool:
+                return value in bool_index
+            return value in other_index
+        except TypeError:
+            # unhashable value
+            return value in others
+
+    return test
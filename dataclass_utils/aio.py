@@ -0,0 +1,97 @@
+"""`check_type` and `into` for asyncio, which don't block the event loop for long
+
+Values are walked by the iterative engine (see `compile_check`), which yields to the event
+loop after a budget of nodes or time. Containers are walked in slices of `max_nodes` items,
+so that large ones yield too. Large values can be sent to an executor instead.
+
+>>> import asyncio, dataclasses
+>>> from typing import List
+>>> @dataclasses.dataclass
+... class Foo:
+...     a: List[int]
+>>> asyncio.run(into_async({"a": [1]}, Foo))
+Foo(a=[1])
+>>> asyncio.run(check_type_async(Foo([1])))
+"""
+
+import asyncio
+import dataclasses
+import functools
+from concurrent.futures import Executor
+from typing import Any, Optional, Sized, Type, TypeVar
+
+from dataclass_utils import into_dataclass, type_checker
+from dataclass_utils._internal.iterative import run_async
+from dataclass_utils.error import Error, Error0
+from dataclass_utils.into_dataclass import V, into_root
+from dataclass_utils.type_checker import check_root
+
+T = TypeVar("T")
+
+
+async def check_type_async(
+    value: Any,
+    *,
+    max_nodes: int = 1000,
+    max_time: float = 0.005,
+    executor: Optional[Executor] = None,
+    offload_size: int = 0,
+) -> None:
+    """Same as `check_type`, but yields to the event loop after every `max_nodes` nodes
+    (dataclasses, containers and their items) or `max_time` seconds.
+
+    If `executor` is given, values whose size (see `_size`) is at least `offload_size` are
+    checked in it instead. With a process executor, `value` must be picklable.
+    """
+    ty = type(value)
+    if not dataclasses.is_dataclass(ty):
+        raise Error0(ty, value)
+    if executor is not None and _size(value) >= offload_size:
+        check = functools.partial(check_root, value, iterative=True)
+        await asyncio.get_running_loop().run_in_executor(executor, check)
+        return
+    step = type_checker._root_step(ty, max_nodes)
+    err = await run_async(step, value, max_nodes, max_time)
+    if err is not None:
+        raise err
+
+
+async def into_async(
+    value: V,
+    kls: Type[T],
+    *,
+    max_nodes: int = 1000,
+    max_time: float = 0.005,
+    executor: Optional[Executor] = None,
+    offload_size: int = 0,
+) -> T:
+    """Same as `into`, but yields to the event loop after every `max_nodes` nodes
+    (dataclasses, containers and their items) or `max_time` seconds.
+
+    If `executor` is given, values whose size (see `_size`) is at least `offload_size` are
+    converted in it instead. With a process executor, `value` and `kls` must be picklable.
+    """
+    if executor is not None and _size(value) >= offload_size:
+        convert = functools.partial(into_root, value, kls, iterative=True)
+        return await asyncio.get_running_loop().run_in_executor(executor, convert)
+    step = into_dataclass._root_step(kls, max_nodes)
+    ret = await run_async(step, value, max_nodes, max_time)
+    if isinstance(ret, Error):
+        raise ret
+    return ret
+
+
+def _size(value: Any) -> int:
+    """Cheap estimate of the size of `value`: the number of its items, plus those of the
+    containers in its fields for dataclasses
+    """
+    if isinstance(value, Sized):
+        return len(value)
+    elif dataclasses.is_dataclass(value):
+        n = 1
+        for f in dataclasses.fields(value):
+            v = getattr(value, f.name, None)
+            if isinstance(v, Sized) and not isinstance(v, (str, bytes)):
+                n += len(v)
+        return n
+    return 1
@@ -0,0 +1,200 @@
+"""Convert or check many records at once"""
+
+import dataclasses
+import itertools
+import os
+import pickle
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Type, TypeVar
+
+from dataclass_utils.error import Error, Error0
+from dataclass_utils.into_dataclass import Converter, V, compile_into
+from dataclass_utils.type_checker import Checker, compile_check
+from dataclass_utils.typing import Literal
+
+T = TypeVar("T")
+
+# What to do with a bad record:
+# - "raise": raise its error (fail fast)
+# - "skip": drop it
+# - "collect": drop it, and append its error to `errors`
+ErrorPolicy = Literal["raise", "skip", "collect"]
+
+
+def into_many(
+    values: Iterable[V],
+    kls: Type[T],
+    on_error: ErrorPolicy = "raise",
+    errors: Optional[List[Error]] = None,
+) -> Iterator[T]:
+    """Lazily converts each record in `values` into `kls`.
+
+    The converter for `kls` is resolved once for the whole batch.
+    Errors have `index` set to the position of the bad record.
+
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: int
+    >>> list(into_many([{"a": 1}, {"a": 2}], Foo))
+    [Foo(a=1), Foo(a=2)]
+    >>> errors = []
+    >>> list(into_many([{"a": 1}, {"a": "x"}], Foo, "collect", errors))
+    [Foo(a=1)]
+    >>> errors[0].index, errors[0].path
+    (1, ['a'])
+    """
+    _check_policy(on_error, errors)
+    return _into_many(values, compile_into(kls), on_error, errors)
+
+
+def _into_many(
+    values: Iterable[V],
+    converter: Converter,
+    on_error: ErrorPolicy,
+    errors: Optional[List[Error]],
+) -> Iterator[Any]:
+    for i, value in enumerate(values):
+        ret = converter(value)
+        if isinstance(ret, Error):
+            _handle_error(ret, i, on_error, errors)
+        else:
+            yield ret
+
+
+def into_many_parallel(
+    values: Iterable[V],
+    kls: Type[T],
+    on_error: ErrorPolicy = "raise",
+    errors: Optional[List[Error]] = None,
+    *,
+    chunksize: int = 1000,
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Iterator[T]:
+    """Same as `into_many`, but converts chunks of `chunksize` records in worker processes.
+
+    Results are yielded in input order. Only a few chunks per worker are in flight at once,
+    so `values` can be a large lazy iterable.
+    `kls` must be picklable, i.e. defined at the top level of an importable module.
+    If `executor` is not given, a `ProcessPoolExecutor` is created for the batch.
+    """
+    _check_policy(on_error, errors)
+    if chunksize < 1:
+        raise ValueError(f"`chunksize` must be positive, got {chunksize}")
+    try:
+        pickle.dumps(kls)
+    except Exception as e:
+        raise TypeError(
+            f"{kls} cannot be sent to worker processes, because it is not picklable "
+            "(is it defined at the top level of an importable module?)"
+        ) from e
+    return _into_many_parallel(
+        values, kls, on_error, errors, chunksize, max_workers, executor
+    )
+
+
+def _into_many_parallel(
+    values: Iterable[V],
+    kls: Type[T],
+    on_error: ErrorPolicy,
+    errors: Optional[List[Error]],
+    chunksize: int,
+    max_workers: Optional[int],
+    executor: Optional[Executor],
+) -> Iterator[T]:
+    own_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers)
+    # chunks in flight
+    window = 2 * (max_workers or os.cpu_count() or 1)
+    it = iter(values)
+    pending: Deque["Future[List[Any]]"] = deque()
+    try:
+        start = 0
+        while True:
+            while len(pending) < window:
+                chunk = list(itertools.islice(it, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_into_chunk, kls, chunk))
+            if not pending:
+                break
+            results = pending.popleft().result()
+            for i, ret in enumerate(results, start):
+                if isinstance(ret, Error):
+                    _handle_error(ret, i, on_error, errors)
+                else:
+                    yield ret
+            start += len(results)
+    finally:
+        for f in pending:
+            f.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
+def _into_chunk(kls: Type[T], chunk: List[V]) -> List[Any]:
+    # runs in worker processes, on unpickled copies which can be adopted
+    converter = compile_into(kls, adopt=True)
+    return [converter(value) for value in chunk]
+
+
+def check_many(
+    values: Iterable[T],
+    on_error: ErrorPolicy = "raise",
+    errors: Optional[List[Error]] = None,
+) -> Iterator[T]:
+    """Lazily checks each dataclass record in `values`, and yields the valid ones.
+
+    The checker is resolved once per distinct record type.
+    Errors have `index` set to the position of the bad record.
+
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: int
+    >>> errors = []
+    >>> list(check_many([Foo(1), Foo("x"), Foo(2)], "collect", errors))
+    [Foo(a=1), Foo(a=2)]
+    >>> errors[0].index
+    1
+    """
+    _check_policy(on_error, errors)
+    return _check_many(values, on_error, errors)
+
+
+def _check_many(
+    values: Iterable[T],
+    on_error: ErrorPolicy,
+    errors: Optional[List[Error]],
+) -> Iterator[T]:
+    last_ty: Any = None
+    checker: Optional[Checker] = None
+    for i, value in enumerate(values):
+        ty = type(value)
+        if ty is not last_ty:
+            last_ty = ty
+            checker = compile_check(ty) if dataclasses.is_dataclass(ty) else None
+        err = checker(value) if checker is not None else Error0(ty, value)
+        if err is not None:
+            _handle_error(err, i, on_error, errors)
+        else:
+            yield value
+
+
+def _check_policy(on_error: ErrorPolicy, errors: Optional[List[Error]]):
+    if on_error not in ("raise", "skip", "collect"):
+        raise ValueError(f"Invalid error policy: {on_error}")
+    if on_error == "collect" and errors is None:
+        raise ValueError("`errors` list is required for 'collect' error policy")
+
+
+def _handle_error(
+    err: Error, index: int, on_error: ErrorPolicy, errors: Optional[List[Error]]
+):
+    err.index = index
+    if on_error == "raise":
+        raise err
+    elif on_error == "collect":
+        assert errors is not None
+        errors.append(err)
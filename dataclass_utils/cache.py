@@ -0,0 +1,156 @@
+"""Caches of per-type precomputation (compiled checkers, converters and type hints)
+
+>>> from typing import List
+>>> from dataclass_utils.type_checker import check
+>>> clear_cache()
+>>> check([1], List[int])
+>>> check([2], List[int])
+>>> info = cache_info()["check"]
+>>> info.hits > 0 and info.misses > 0
+True
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Generic, NamedTuple, Optional, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+DEFAULT_CAPACITY = 4096
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    capacity: Optional[int]  # None if unbounded
+
+
+class LRUCache(Generic[K, V]):
+    """Least recently used cache, which evicts entries over `capacity`"""
+
+    def __init__(self, capacity: Optional[int] = DEFAULT_CAPACITY):
+        self._data: "OrderedDict[K, V]" = OrderedDict()
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V:
+        """Returns the value for `key`, or raises `KeyError`.
+
+        `TypeError` is raised for unhashable keys.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            # evicted by another thread
+            pass
+        return value
+
+    def put(self, key: K, value: V) -> V:
+        """Sets `value` for `key` unless it is already set, and returns the value in the cache"""
+        with self._lock:
+            value = self._data.setdefault(key, value)
+            self._evict()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def set_capacity(self, capacity: Optional[int]):
+        with self._lock:
+            self._capacity = capacity
+            self._evict()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, len(self._data), self._capacity
+        )
+
+    def _evict(self):
+        if self._capacity is None:
+            return
+        while len(self._data) > self._capacity:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+class WeakCache(Generic[K, V]):
+    """Cache whose entries are dropped with their keys"""
+
+    def __init__(self):
+        self._data: "weakref.WeakKeyDictionary[K, V]" = weakref.WeakKeyDictionary()
+        self._inserted = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> V:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> V:
+        value = self._data.setdefault(key, value)
+        self._inserted += 1
+        return value
+
+    def clear(self):
+        self._data.clear()
+        self._inserted = 0
+
+    def set_capacity(self, capacity: Optional[int]):
+        # bounded by the lifetime of keys
+        pass
+
+    def info(self) -> CacheInfo:
+        size = len(self._data)
+        return CacheInfo(self.hits, self.misses, self._inserted - size, size, None)
+
+
+_caches: Dict[str, Any] = {}
+C = TypeVar("C", LRUCache[Any, Any], WeakCache[Any, Any])
+
+
+def register(name: str, cache: C) -> C:
+    """Registers `cache` to be managed by the functions below"""
+    _caches[name] = cache
+    return cache
+
+
+def cache_info() -> Dict[str, CacheInfo]:
+    """Returns statistics of each cache, e.g. "check", "into" and "type_hints" """
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def clear_cache():
+    """Drops all cached entries. Statistics are kept."""
+    for cache in _caches.values():
+        cache.clear()
+
+
+def set_cache_capacity(capacity: Optional[int]):
+    """Sets the max number of entries of each bounded cache. None means unbounded.
+
+    Compiled checkers and converters of nested types refer to each other,
+    so evicted entries may stay alive while an entry which refers to them is alive.
+    """
+    if capacity is not None and capacity < 1:
+        raise ValueError(f"`capacity` must be positive, got {capacity}")
+    for cache in _caches.values():
+        cache.set_capacity(capacity)
@@ -1,7 +1,11 @@
-from typing import Any, List, Optional, Type
+import sys
+from typing import Any, Callable, Dict, List, Optional, Type
 
 
 class Error(TypeError):
+    # position of the failing record, set by the batch APIs (e.g. `into_many`)
+    index: Optional[int] = None
+
     def __init__(self, ty: Type[Any], value: Any, path: Optional[List[str]] = None):
         if type(self) == Error:
             raise ValueError(
@@ -14,6 +18,16 @@ class Error(TypeError):
     def __str__(self) -> str:
         raise NotImplementedError()
 
+    def __reduce__(self):
+        # `__init__` signatures differ among subclasses, so restore from attributes
+        return (_restore_error, (type(self), self.__dict__))
+
+
+def _restore_error(kls: Type[Error], state: Dict[str, Any]) -> Error:
+    err = kls.__new__(kls)
+    err.__dict__.update(state)
+    return err
+
 
 def _path_to_str(path: List[str]) -> str:
     return " -> ".join(reversed(path))
@@ -63,3 +77,94 @@ class UnsupportedTypeError(Error):
     def __str__(self) -> str:
         path = _path_to_str(self.path)
         return f"UnsupportedType in '{path}': {self.ty}"
+
+
+class _DiscardedPath(list):  # type: ignore
+    def append(self, _: Any):
+        pass
+
+
+class _Failure(Error):
+    """Stand-in for errors which are discarded anyway, e.g. in members of `Union`.
+
+    A single instance is shared, so that failing is almost free.
+    It never reaches users.
+    """
+
+    def __init__(self):
+        self.ty = None
+        self.value = None
+        self.path = _DiscardedPath()
+
+    def __str__(self) -> str:
+        return "Internal Error: `_Failure` must not be raised"
+
+
+_FAILURE = _Failure()
+
+
+def _fail(*args: Any, **kwargs: Any) -> Error:
+    return _FAILURE
+
+
+def _error0(quiet: bool) -> Callable[..., Error]:
+    """Returns `Error0`, or `_fail` if the errors are discarded"""
+    return _fail if quiet else Error0
+
+
+def _missing_key_error(quiet: bool) -> Callable[..., Error]:
+    return _fail if quiet else MissingKeyError
+
+
+class AggregateError(Error):
+    """Errors collected in a single pass over a value
+
+    `errors` have their own paths, and are at most `max_errors` given to the API.
+    """
+
+    def __init__(
+        self,
+        ty: Type[Any],
+        value: Any,
+        errors: List[Error],
+        path: Optional[List[str]] = None,
+    ):
+        self.ty = ty
+        self.value = value
+        self.errors = errors
+        self.path = path or []
+
+    def __str__(self) -> str:
+        msg = f"{len(self.errors)} errors in {self.ty}:"
+        for err in self.errors:
+            msg += f"\n- {err}"
+        return msg
+
+
+_NO_KEY = object()
+
+
+def _add_errors(errors: List[Error], err: Error, key: Any = _NO_KEY):
+    """Adds `err` (or errors in it, if it is `AggregateError`) to `errors`,
+    appending `key` to their paths"""
+    new = err.errors if isinstance(err, AggregateError) else [err]
+    if key is not _NO_KEY:
+        for e in new:
+            e.path.append(key)
+    errors.extend(new)
+
+
+def _aggregate(
+    ty: Type[Any], value: Any, errors: List[Error], max_errors: int
+) -> Optional[AggregateError]:
+    if not errors:
+        return None
+    return AggregateError(ty, value, errors[:max_errors])
+
+
+def _max_errors(max_errors: Optional[int]) -> int:
+    if max_errors is None:
+        return sys.maxsize
+    if max_errors < 1:
+        raise ValueError(f"`max_errors` must be positive, got {max_errors}")
+    return max_errors
@@ -1,72 +1,282 @@
 """Convert dict into dataclass"""
 
+import collections.abc
 import dataclasses
+import itertools
 import logging
-from typing import Any, Dict, Iterable, List, Sized, Type, TypeVar, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sized,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
-from dataclass_utils._internal.shared import is_pep604_union
-from dataclass_utils.error import Error, Error0, MissingKeyError
+from dataclass_utils import profile as _profile
+from dataclass_utils._internal import codegen as _codegen
+from dataclass_utils._internal.iterative import Node, NodeFn, Step, run
+from dataclass_utils._internal.shared import (
+    BUFFER_TYPES,
+    SCALAR_TYPES,
+    SEQUENCE_ORIGINS,
+    Discriminator,
+    buffer_item_type,
+    find_discriminator,
+    is_opaque_buffer,
+    is_pep604_union,
+    literal_test,
+    type_hints,
+    type_table,
+)
+from dataclass_utils.cache import LRUCache, register
+from dataclass_utils.error import (
+    AggregateError,
+    Error,
+    _add_errors,
+    _aggregate,
+    _error0,
+    _max_errors,
+    _missing_key_error,
+)
+from dataclass_utils.type_checker import is_typeddict
 from dataclass_utils.typing import Literal, get_args, get_origin
 
 T = TypeVar("T")
 V = Union[Dict[Any, Any], List[Any], int, float, str, bool, Any]
 
 Result = Union[T, Error]
+Converter = Callable[[V], Result[Any]]
 logger = logging.getLogger(__name__)
 
 
+class _Options(NamedTuple):
+    codegen: bool
+    max_errors: int = 1
+    # only success or failure matters, so errors are not built (e.g. in `Union` members)
+    quiet: bool = False
+    # nodes are wrapped to record calls and time (see `dataclass_utils.profile`)
+    profile: bool = False
+    # containers are returned as is if no item is converted (see `compile_into`)
+    adopt: bool = False
+    # nested values are converted with an explicit stack (see `_compile_step`)
+    iterative: bool = False
+    # items of containers are converted in slices of this size (see `_step_slices`)
+    slice_size: int = 0
+
+
+# compiled converters, keyed by (type, options)
+_converters: "LRUCache[Any, Converter]" = register("into", LRUCache())
+# compiled steps of the iterative engine, keyed by (type, options)
+_steps: "LRUCache[Any, Step]" = register("into_step", LRUCache())
+
+
 def is_error(v: Result[Any]) -> bool:
     return isinstance(v, Error)
 
 
-def into_root(value: V, kls: Type[T]) -> T:
-    ret = into(value, kls)
+def into_root(
+    value: V,
+    kls: Type[T],
+    *,
+    max_errors: Optional[int] = 1,
+    adopt: bool = False,
+    iterative: bool = False,
+) -> T:
+    """Converts `value` into `kls`, raising the error if fails
+
+    If `max_errors` is not 1, the whole value is converted and up to `max_errors` errors
+    (all of them if None) are raised as an `AggregateError`.
+    For `adopt` and `iterative`, see `compile_into`.
+    """
+    converter = compile_into(
+        kls, max_errors=max_errors, adopt=adopt, iterative=iterative
+    )
+    ret = converter(value)
     if isinstance(ret, Error):
+        if max_errors != 1 and not isinstance(ret, AggregateError):
+            ret = AggregateError(kls, value, [ret])
         raise ret
     return ret
 
 
 def into(value: V, kls: Type[T]) -> Result[T]:
+    return compile_into(kls)(value)
+
+
+def compile_into(
+    kls: Type[T],
+    *,
+    codegen: bool = False,
+    max_errors: Optional[int] = 1,
+    adopt: bool = False,
+    iterative: bool = False,
+) -> Callable[[V], Result[T]]:
+    """Returns a converter function for `kls`, which is built once and cached.
+
+    Field tables, sub-converters and constructors are resolved here, so the returned function
+    doesn't introspect types.
+    With `codegen=True`, dataclasses are converted by functions generated from source,
+    which read fields and call the constructor directly.
+    If `max_errors` is not 1, the converter goes on after errors, and returns up to
+    `max_errors` errors (all of them if None) as an `AggregateError`.
+    Dataclasses are not generated from source in this mode.
+    With `adopt=True`, lists, sets, frozensets, tuples and dicts which already have the
+    exact target type are returned as is, unless some item is converted (e.g. into a
+    dataclass), so that the result may share containers with `value`.
+    Containers are copied in the `max_errors` mode.
+    With `iterative=True`, nested dataclasses and containers are converted with an explicit
+    stack instead of recursive calls, so that arbitrarily deep values don't raise
+    `RecursionError`. Errors are the same as the recursive ones.
+    It cannot be combined with `max_errors`.
+
+    # Example
+
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: int
+    >>> @dataclasses.dataclass
+    ... class Bar:
+    ...     foo: Foo
+    ...     b: str
+    >>> data = {"foo": {"a": 1}, "b": "foo"}
+    >>> bar = compile_into(Bar)(data)
+    >>> assert bar.foo == Foo(**data["foo"]) # field `foo` is instantiated as `Foo`, not dict
+    >>> assert compile_into(Bar) is compile_into(Bar)
+    """
+    opts = _Options(
+        codegen,
+        _max_errors(max_errors),
+        profile=_profile.is_enabled(),
+        adopt=adopt,
+        iterative=iterative,
+    )
+    if iterative:
+        if opts.max_errors != 1:
+            raise ValueError("`iterative` cannot be combined with `max_errors`")
+        step = _compile_step(kls, opts)
+        return lambda value: run(step, value)
+    return _compile_into(kls, opts)
+
+
+def _compile_into(kls: Type[T], opts: _Options) -> Converter:
+    key = (kls, opts)
+    try:
+        return _converters.get(key)
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable type, which cannot be cached
+        return _compile(kls, opts)
+    converter = _compile(kls, opts)
+    return _converters.put(key, converter)
+
+
+def _compile(kls: Type[T], opts: _Options) -> Converter:
+    converter = _compile_node(kls, opts)
+    if opts.profile:
+        return _profile.instrument("into", kls, converter)
+    return converter
+
+
+def _compile_node(kls: Type[T], opts: _Options) -> Converter:
     if dataclasses.is_dataclass(kls):
-        # dataclass
-        return _into_dataclass(value, kls)
+        # dataclass; generated functions have no per field nodes to profile
+        if opts.codegen and opts.max_errors == 1 and not opts.profile:
+            return _generate_dataclass(kls, opts)
+        return _compile_dataclass(kls, opts)
     else:
         to = get_origin(kls)
         if to is not None:
             # generics
             if to is list or to is set or to is frozenset:
-                ret = _into_mono_container(value, kls)
+                return _compile_mono_container(kls, opts)
             elif to is dict:
-                ret = _into_dict(value, kls)
+                return _compile_dict(kls, opts)
             elif to is tuple:
-                ret = _into_tuple(value, kls)
+                if len(get_args(kls)) == 2 and get_args(kls)[1] is ...:
+                    # arbitrary length tuple (e.g. Tuple[int, ...])
+                    return _compile_mono_container(kls, opts)
+                return _compile_tuple(kls, opts)
+            elif to in SEQUENCE_ORIGINS and get_args(kls):
+                return _compile_sequence(kls, to, opts)
             elif to is Union or is_pep604_union(to):
-                ret = _into_union(value, kls)
+                return _compile_union(kls, opts)
             elif to is Literal:
-                ret = _into_literal(value, kls)
-            elif isinstance(value, to):
-                ret = cast(T, value)
-            elif to == type:
-                ret = _into_type(value, kls)
+                return _compile_literal(kls, opts)
             else:
-                ret = Error0(kls, value)
-            return ret
+                return _compile_origin(kls, to, opts)
         elif type(kls) == TypeVar:
             logger.warning("Since `TypeVar` is not supported, skip the type check")
-            return value  # type: ignore
+            return _into_any
         elif kls is None:
-            if value is None:
-                return value
+            return _compile_none(opts)
         elif is_pep604_union(kls):
-            pass
+            return _compile_error(kls, opts)
+        elif kls is Any:
+            return _into_any
         else:
-            try:
-                if isinstance(value, kls):
-                    return value
-            except TypeError:
-                if kls is Any:
-                    return value  # type: ignore
-        return Error0(kls, value)
+            return _compile_instance(kls, opts)
+
+
+def _into_any(value: V) -> Result[Any]:
+    return value
+
+
+def _compile_none(opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+
+    def into_none(value: V) -> Result[Any]:
+        if value is None:
+            return value
+        return error0(None, value)
+
+    return into_none
+
+
+def _compile_error(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+
+    def into_error(value: V) -> Result[T]:
+        return error0(kls, value)
+
+    return into_error
+
+
+def _compile_instance(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+
+    def into_instance(value: V) -> Result[T]:
+        try:
+            if isinstance(value, kls):
+                return value
+        except TypeError:
+            pass
+        return error0(kls, value)
+
+    return into_instance
+
+
+def _compile_origin(kls: Type[T], to: Any, opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+
+    def into_origin(value: V) -> Result[T]:
+        if isinstance(value, to):
+            return cast(T, value)
+        elif to == type:
+            return _into_type(value, kls)
+        return error0(kls, value)
+
+    return into_origin
 
 
 def _into_type(value: Any, kls: Type[T]) -> Result[T]:
@@ -78,11 +288,16 @@ def _into_type(value: Any, kls: Type[T]) -> Result[T]:
     return value
 
 
-def _into_literal(value: V, kls: Type[T]) -> Result[T]:
-    literals = get_args(kls)
-    if value not in literals:
-        return Error0(kls, value)
-    return value  # type: ignore
+def _compile_literal(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+    is_literal = literal_test(get_args(kls))
+
+    def into_literal(value: V) -> Result[T]:
+        if not is_literal(value):
+            return error0(kls, value)
+        return value  # type: ignore
+
+    return into_literal
 
 
 def _is_sized_iterable(v: Any) -> bool:
@@ -90,109 +305,768 @@ def _is_sized_iterable(v: Any) -> bool:
     # bug: https://github.com/microsoft/pyright/issues/1856
 
 
-def _into_tuple(value: V, kls: Type[T]) -> Result[T]:
-    if not _is_sized_iterable(value):
-        return Error0(kls, value)
-
+def _compile_tuple(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
     types = get_args(kls)
-    val0: Sized = value  # type: ignore
-    if len(types) != len(val0):
-        return Error0(ty=kls, value=val0)
-
-    val1: Iterable[T] = value  # type: ignore
-    ret: List[T] = []
-    for v, t in zip(val1, types):
-        vr = into(v, t)  # type: ignore
-        if isinstance(vr, Error):
-            return vr
-        ret.append(vr)
+    converters = [_compile_into(t, opts) for t in types]
+    n = len(converters)
     ty_orig = get_origin(kls)
     assert ty_orig is not None
-    return ty_orig(ret)
+
+    def into_tuple(value: V) -> Result[T]:
+        if not _is_sized_iterable(value):
+            return error0(kls, value)
+        items = cast(Collection[Any], value)
+        if n != len(items):
+            return error0(ty=kls, value=value)
+        ret: List[Any] = []
+        for v, c in zip(items, converters):
+            vr = c(v)
+            if isinstance(vr, Error):
+                return vr
+            ret.append(vr)
+        return ty_orig(ret)
+
+    max_errors = opts.max_errors
+
+    def collect_tuple(value: V) -> Result[T]:
+        if not _is_sized_iterable(value):
+            return error0(kls, value)
+        items = cast(Collection[Any], value)
+        if n != len(items):
+            return error0(ty=kls, value=value)
+        ret: List[Any] = []
+        errors: List[Error] = []
+        for v, c in zip(items, converters):
+            vr = c(v)
+            if isinstance(vr, Error):
+                _add_errors(errors, vr)
+                if len(errors) >= max_errors:
+                    break
+            ret.append(vr)
+        return _aggregate(kls, value, errors, max_errors) or ty_orig(ret)
+
+    def adopt_tuple(value: V) -> Result[T]:
+        if type(value) is not ty_orig:
+            return into_tuple(value)
+        items = cast(Tuple[Any, ...], value)
+        if n != len(items):
+            return error0(ty=kls, value=value)
+        ret: Optional[List[Any]] = None
+        for i, (v, c) in enumerate(zip(items, converters)):
+            vr = c(v)
+            if isinstance(vr, Error):
+                return vr
+            if ret is None:
+                if vr is v:
+                    continue
+                ret = list(items[:i])
+            ret.append(vr)
+        # the guard narrows `ty_orig` to the types in `V`
+        return value if ret is None else ty_orig(ret)  # type: ignore
+
+    if max_errors > 1:
+        return collect_tuple
+    if opts.adopt:
+        return adopt_tuple
+    return into_tuple
 
 
-def _into_dict(value: V, kls: Type[T]) -> Result[T]:
-    if not isinstance(value, dict):
-        return Error0(kls, value)
+def _compile_dict(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
     args = get_args(kls)
-    ty_key = args[0]
-    ty_item = args[1]
+    into_key = _compile_into(args[0], opts)
+    into_item = _compile_into(args[1], opts)
     orig = get_origin(kls)
     assert orig is not None
-    ret = orig()
-    for k, v in value.items():
-        kr = into(k, ty_key)
-        if is_error(kr):
-            return kr
-        vr = into(v, ty_item)
-        if is_error(vr):
-            vr.path.append(k)
-            return vr
-        ret[kr] = vr
-    return ret
 
+    def into_dict(value: V) -> Result[T]:
+        if not isinstance(value, dict):
+            return error0(kls, value)
+        ret = orig()
+        for k, v in value.items():
+            kr = into_key(k)
+            if isinstance(kr, Error):
+                return kr
+            vr = into_item(v)
+            if isinstance(vr, Error):
+                vr.path.append(k)
+                return vr
+            ret[kr] = vr
+        return ret
+
+    max_errors = opts.max_errors
+
+    def collect_dict(value: V) -> Result[T]:
+        if not isinstance(value, dict):
+            return error0(kls, value)
+        ret = orig()
+        errors: List[Error] = []
+        for k, v in value.items():
+            kr = into_key(k)
+            if isinstance(kr, Error):
+                _add_errors(errors, kr)
+            vr = into_item(v)
+            if isinstance(vr, Error):
+                _add_errors(errors, vr, k)
+            if errors:
+                if len(errors) >= max_errors:
+                    break
+                continue
+            ret[kr] = vr
+        return _aggregate(kls, value, errors, max_errors) or ret
+
+    def adopt_dict(value: V) -> Result[T]:
+        if type(value) is not orig:
+            return into_dict(value)
+        items = cast(Dict[Any, Any], value).items()
+        ret: Optional[Dict[Any, Any]] = None
+        for i, (k, v) in enumerate(items):
+            kr = into_key(k)
+            if isinstance(kr, Error):
+                return kr
+            vr = into_item(v)
+            if isinstance(vr, Error):
+                vr.path.append(k)
+                return vr
+            if ret is None:
+                if kr is k and vr is v:
+                    continue
+                ret = dict(itertools.islice(items, i))
+            ret[kr] = vr
+        return value if ret is None else ret  # type: ignore
+
+    if max_errors > 1:
+        return collect_dict
+    if opts.adopt:
+        return adopt_dict
+    return into_dict
 
-def _into_mono_container(value: V, kls: Type[T]) -> Result[T]:
-    if isinstance(value, str):
-        return Error0(kls, value)
-    if not _is_sized_iterable(value):
-        return Error0(kls, value)
-    ty_item = get_args(kls)[0]
+
+def _compile_mono_container(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+    item_ty = get_args(kls)[0]
+    into_item = _compile_into(item_ty, opts)
     ty_orig = get_origin(kls)
     assert ty_orig
-    ret: List[T] = []
-    for v in cast(Iterable[T], value):
-        w = into(v, ty_item)  # type: ignore
-        if isinstance(w, Error):
-            return w
-        ret.append(w)
-    return ty_orig(ret)
+    # profiled plans record every item
+    buffer_items = item_ty in SCALAR_TYPES and not opts.profile
 
+    def into_mono_container(value: V) -> Result[T]:
+        if isinstance(value, str) or is_opaque_buffer(value):
+            return error0(kls, value)
+        if buffer_items and type(value) in BUFFER_TYPES:
+            t = buffer_item_type(value)
+            if t is not None and issubclass(t, item_ty):
+                # items are already of `item_ty`, so copied at once
+                return ty_orig(value)
+        if not _is_sized_iterable(value):
+            return error0(kls, value)
+        ret: List[Any] = []
+        for v in cast(Iterable[Any], value):
+            w = into_item(v)
+            if isinstance(w, Error):
+                return w
+            ret.append(w)
+        return ty_orig(ret)
 
-def _into_union(value: V, kls: Type[T]) -> Result[T]:
-    types = get_args(kls)
-    err = Error0(ty=kls, value=value)
-    for ty in types:
-        ret = into(value, ty)
-        if not is_error(ret):
-            return ret
-    return err
+    max_errors = opts.max_errors
 
+    def collect_mono_container(value: V) -> Result[T]:
+        if isinstance(value, str) or is_opaque_buffer(value):
+            return error0(kls, value)
+        if not _is_sized_iterable(value):
+            return error0(kls, value)
+        ret: List[Any] = []
+        errors: List[Error] = []
+        for v in cast(Iterable[Any], value):
+            w = into_item(v)
+            if isinstance(w, Error):
+                _add_errors(errors, w)
+                if len(errors) >= max_errors:
+                    break
+            ret.append(w)
+        return _aggregate(kls, value, errors, max_errors) or ty_orig(ret)
 
-def _into_dataclass(value: V, kls: Type[T]) -> Result[T]:
-    """Recursively constructs dataclass from dict
+    def adopt_mono_container(value: V) -> Result[T]:
+        if type(value) is not ty_orig:
+            return into_mono_container(value)
+        items = cast(Iterable[Any], value)
+        ret: Optional[List[Any]] = None
+        for i, v in enumerate(items):
+            w = into_item(v)
+            if isinstance(w, Error):
+                return w
+            if ret is None:
+                if w is v:
+                    continue
+                # sets iterate in the same order while unchanged
+                ret = list(itertools.islice(items, i))
+            ret.append(w)
+        # the guard narrows `ty_orig` to the types in `V`
+        return value if ret is None else ty_orig(ret)  # type: ignore
 
-    # Example
+    if max_errors > 1:
+        return collect_mono_container
+    if opts.adopt:
+        return adopt_mono_container
+    return into_mono_container
 
-    >>> @dataclasses.dataclass
-    ... class Foo:
-    ...     a: int
-    >>> @dataclasses.dataclass
-    ... class Bar:
-    ...     foo: Foo
-    ...     b: str
-    >>> data = {"foo": {"a": 1}, "b": "foo"}
-    >>> bar = _into_dataclass(data, Bar)
-    >>> assert bar.foo == Foo(**data["foo"]) # field `foo` is instantiated as `Foo`, not dict
+
+def _compile_sequence(kls: Type[T], to: Any, opts: _Options) -> Converter:
+    """`Sequence[X]` accepts any sequence, which is returned as is unless some item is
+    converted, so that e.g. tuples and buffers are not copied.
+    """
+    error0 = _error0(opts.quiet)
+    item_ty = get_args(kls)[0]
+    into_item = _compile_into(item_ty, opts)
+    buffer_items = item_ty in SCALAR_TYPES and not opts.profile
+
+    def into_sequence(value: V) -> Result[T]:
+        # iterating opaque buffers would raise `NotImplementedError`
+        if not isinstance(value, to) or is_opaque_buffer(value):
+            return error0(kls, value)
+        if buffer_items and type(value) in BUFFER_TYPES:
+            t = buffer_item_type(value)
+            if t is not None and issubclass(t, item_ty):
+                return value
+        ret: Optional[List[Any]] = None
+        for i, v in enumerate(value):
+            w = into_item(v)
+            if isinstance(w, Error):
+                return w
+            if ret is None:
+                if w is v:
+                    continue
+                ret = list(itertools.islice(value, i))
+            ret.append(w)
+        return value if ret is None else ret  # type: ignore
+
+    max_errors = opts.max_errors
+
+    def collect_sequence(value: V) -> Result[T]:
+        if not isinstance(value, to) or is_opaque_buffer(value):
+            return error0(kls, value)
+        ret: Optional[List[Any]] = None
+        errors: List[Error] = []
+        for i, v in enumerate(value):
+            w = into_item(v)
+            if isinstance(w, Error):
+                _add_errors(errors, w)
+                if len(errors) >= max_errors:
+                    break
+            if ret is None:
+                if w is v:
+                    continue
+                ret = list(itertools.islice(value, i))
+            ret.append(w)
+        err = _aggregate(kls, value, errors, max_errors)
+        if err is not None:
+            return err
+        return value if ret is None else ret  # type: ignore
+
+    if max_errors > 1:
+        return collect_sequence
+    return into_sequence
+
+
+def _compile_union(kls: Type[T], opts: _Options) -> Converter:
+    error0 = _error0(opts.quiet)
+    # only the first member which succeeds matters
+    member_opts = opts._replace(max_errors=1, quiet=True)
+    members = get_args(kls)
+    converters = [_compile_into(ty, member_opts) for ty in members]
+    # members to try for each exact value type
+    table = type_table([(_accepted_types(t), c) for t, c in zip(members, converters)])
+
+    def into_union(value: V) -> Result[T]:
+        for c in table.get(type(value), converters):
+            ret = c(value)
+            if not isinstance(ret, Error):
+                return ret
+        return error0(ty=kls, value=value)
+
+    discriminator = find_discriminator(get_args(kls))
+    if discriminator is not None:
+        return _compile_tagged_union(discriminator, into_union, opts)
+    return into_union
+
+
+def _accepted_types(kls: Type[Any]) -> Optional[Tuple[type, ...]]:
+    """Returns the types whose instances may be converted into `kls`, or None if unknown"""
+    if dataclasses.is_dataclass(kls):
+        return (dict,)
+    elif is_typeddict(kls):
+        return None
+    to = get_origin(kls)
+    if to is not None:
+        if to is list or to is set or to is frozenset or to is tuple:
+            # any sized iterable
+            return (collections.abc.Sized,)
+        elif to is dict:
+            return (dict,)
+        return None
+    elif kls is Any or not isinstance(kls, type) or is_pep604_union(kls):
+        return None
+    return (kls,)
+
+
+_MISSING = object()
+
+
+def _compile_tagged_union(
+    discriminator: Discriminator, into_union: Converter, opts: _Options
+) -> Converter:
+    """Converts a dict into the member of `Union` of dataclasses which its tag selects.
+
+    Values without the tag key are converted with `into_union`.
+    """
+    error0 = _error0(opts.quiet)
+    field, ty_tag = discriminator.field, discriminator.ty
+    optional = discriminator.optional
+    table = {k: _compile_into(t, opts) for k, t in discriminator.members.items()}
+
+    def into_tagged_union(value: V) -> Result[Any]:
+        if value is None and optional:
+            return None
+        if not isinstance(value, dict):
+            return into_union(value)
+        tag = value.get(field, _MISSING)
+        if tag is _MISSING:
+            return into_union(value)
+        try:
+            into_member = table[tag]
+        except (KeyError, TypeError):
+            return error0(ty_tag, tag, [field])
+        return into_member(value)
+
+    return into_tagged_union
+
+
+def _root_step(kls: Type[Any], slice_size: int = 0) -> Step:
+    """Returns the step which `compile_into(kls, iterative=True)` runs.
+
+    With `slice_size`, containers are also walked in slices (see `_step_slices`).
     """
-    if not isinstance(value, dict):
-        return Error0(value=value, ty=dict)
-
-    # convert values into dastaclass recursively
-    d: Dict[str, Any] = dict()
-    fields: Dict[str, Type[Any]] = kls.__annotations__
-    for k, v in value.items():
-        if not isinstance(k, str):
-            return Error0(str, k)
-        if k not in fields:
-            return MissingKeyError(kls, value, k)
-        ty = fields[k]
-        v = into(v, ty)
-        if is_error(v):
-            v.path.append(k)
-            return v
-        d[k] = v
+    opts = _Options(
+        False, profile=_profile.is_enabled(), iterative=True, slice_size=slice_size
+    )
+    return _compile_step(kls, opts)
+
+
+def _compile_step(kls: Type[Any], opts: _Options) -> Step:
+    """Same as `_compile_into`, but for `dataclass_utils._internal.iterative.run`
+
+    Dataclasses, and containers and unions which contain them are nested steps, which yield
+    their items instead of calling converters. Other types are converted by the recursive
+    converters, which don't nest, except that other containers yield slices of their items
+    if `opts.slice_size` is set.
+    """
+    key = (kls, opts)
     try:
-        return kls(**d)  # type: ignore
-    except Exception as e:
-        return Error0(kls, value, exception=e)
+        return _steps.get(key)
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable type, which cannot be cached
+        return _step(kls, opts)
+    step = _step(kls, opts)
+    return _steps.put(key, step)
+
+
+def _step(kls: Type[Any], opts: _Options) -> Step:
+    if dataclasses.is_dataclass(kls):
+        return Step(_step_dataclass(kls, opts), True)
+    to = get_origin(kls)
+    args = get_args(kls)
+    node: Optional[NodeFn] = None
+    if to is not None and args:
+        if to is list or to is set or to is frozenset:
+            node = _step_mono_container(kls, opts) or _step_slices(kls, opts)
+        elif to is tuple and len(args) == 2 and args[1] is ...:
+            node = _step_mono_container(kls, opts) or _step_slices(kls, opts)
+        elif to is tuple:
+            node = _step_tuple(kls, opts)
+        elif to in SEQUENCE_ORIGINS:
+            node = _step_sequence(kls, to, opts) or _step_slices(kls, opts)
+        elif to is dict:
+            node = _step_dict(kls, opts) or _step_slices(kls, opts)
+        elif to is Union or is_pep604_union(to):
+            node = _step_union(kls, opts)
+    if node is None:
+        return Step(_compile_into(kls, opts._replace(iterative=False)), False)
+    return Step(node, True)
+
+
+def _step_mono_container(kls: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    item = _compile_step(get_args(kls)[0], opts)
+    if not item.nested:
+        return None
+    ty_orig = get_origin(kls)
+    assert ty_orig is not None
+
+    def step_mono_container(value: V) -> Node:
+        if isinstance(value, str) or is_opaque_buffer(value):
+            return error0(kls, value)
+        if not _is_sized_iterable(value):
+            return error0(kls, value)
+        ret: List[Any] = []
+        for v in cast(Iterable[Any], value):
+            w = yield item, v
+            if isinstance(w, Error):
+                return w
+            ret.append(w)
+        return ty_orig(ret)
+
+    return step_mono_container
+
+
+def _step_sequence(kls: Type[Any], to: Any, opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    item = _compile_step(get_args(kls)[0], opts)
+    if not item.nested:
+        return None
+
+    def step_sequence(value: V) -> Node:
+        # see `_compile_sequence`
+        if not isinstance(value, to) or is_opaque_buffer(value):
+            return error0(kls, value)
+        ret: Optional[List[Any]] = None
+        for i, v in enumerate(value):
+            w = yield item, v
+            if isinstance(w, Error):
+                return w
+            if ret is None:
+                if w is v:
+                    continue
+                ret = list(itertools.islice(value, i))
+            ret.append(w)
+        return value if ret is None else ret
+
+    return step_sequence
+
+
+def _step_slices(kls: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    """Converts the items of a container whose items don't nest in slices of
+    `opts.slice_size`, so that `run_async` can yield between them.
+
+    Each slice is converted by the converter of `kls`, and the results are merged.
+    Strings, buffers and values which the converter rejects are converted at once.
+    """
+    n = opts.slice_size
+    if not n:
+        return None
+    into_whole = _compile_into(kls, opts._replace(iterative=False, slice_size=0))
+    slice_step = Step(into_whole, False, sliced=True)
+    to = get_origin(kls)
+    assert to is not None
+    cut = dict if to is dict else list
+    # converted slices are merged as they come, so that no step walks all the items
+    new: Callable[[], Any]
+    merge: Callable[[Any, Any], None]
+    if to is dict:
+        new, merge = dict, dict.update
+    elif to is set or to is frozenset:
+        new, merge = set, set.update
+    else:
+        new, merge = list, list.extend
+
+    def step_slices(value: V) -> Node:
+        if to is dict:
+            if not isinstance(value, dict):
+                return into_whole(value)
+            items: Iterator[Any] = iter(value.items())
+        elif (
+            isinstance(value, str)
+            or type(value) in BUFFER_TYPES
+            or not _is_sized_iterable(value)
+            or (to in SEQUENCE_ORIGINS and not isinstance(value, to))
+        ):
+            return into_whole(value)
+        else:
+            items = iter(cast(Iterable[Any], value))
+        ret: Any = new()
+        changed = False
+        while True:
+            chunk = cut(itertools.islice(items, n))
+            if not chunk:
+                break
+            w = yield slice_step, chunk
+            if isinstance(w, Error):
+                return w
+            changed = changed or w is not chunk
+            merge(ret, w)
+        if to in SEQUENCE_ORIGINS:
+            # see `_compile_sequence`
+            return ret if changed else value
+        return ret if type(ret) is to else to(ret)
+
+    return step_slices
+
+
+def _step_tuple(kls: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    steps = [_compile_step(t, opts) for t in get_args(kls)]
+    if not any(s.nested for s in steps):
+        return None
+    n = len(steps)
+    ty_orig = get_origin(kls)
+    assert ty_orig is not None
+
+    def step_tuple(value: V) -> Node:
+        if not _is_sized_iterable(value):
+            return error0(kls, value)
+        items = cast(Collection[Any], value)
+        if n != len(items):
+            return error0(kls, value)
+        ret: List[Any] = []
+        for v, s in zip(items, steps):
+            w = (yield s, v) if s.nested else s.fn(v)
+            if isinstance(w, Error):
+                return w
+            ret.append(w)
+        return ty_orig(ret)
+
+    return step_tuple
+
+
+def _step_dict(kls: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    args = get_args(kls)
+    key = _compile_step(args[0], opts)
+    item = _compile_step(args[1], opts)
+    if not (key.nested or item.nested):
+        return None
+    orig = get_origin(kls)
+    assert orig is not None
+
+    def step_dict(value: V) -> Node:
+        if not isinstance(value, dict):
+            return error0(kls, value)
+        ret = orig()
+        for k, v in value.items():
+            kr = (yield key, k) if key.nested else key.fn(k)
+            if isinstance(kr, Error):
+                return kr
+            vr = (yield item, v) if item.nested else item.fn(v)
+            if isinstance(vr, Error):
+                vr.path.append(k)
+                return vr
+            ret[kr] = vr
+        return ret
+
+    return step_dict
+
+
+def _step_union(kls: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    member_opts = opts._replace(max_errors=1, quiet=True)
+    members = get_args(kls)
+    steps = [_compile_step(t, member_opts) for t in members]
+    if not any(s.nested for s in steps):
+        return None
+    table = type_table([(_accepted_types(t), s) for t, s in zip(members, steps)])
+
+    def step_union(value: V) -> Node:
+        for s in table.get(type(value), steps):
+            ret = (yield s, value) if s.nested else s.fn(value)
+            if not isinstance(ret, Error):
+                return ret
+        return error0(ty=kls, value=value)
+
+    discriminator = find_discriminator(members)
+    if discriminator is None:
+        return step_union
+    field, ty_tag = discriminator.field, discriminator.ty
+    optional = discriminator.optional
+    tagged = {k: _compile_step(t, opts) for k, t in discriminator.members.items()}
+    untagged = Step(step_union, True)
+
+    def step_tagged_union(value: V) -> Node:
+        # see `_compile_tagged_union`
+        if value is None and optional:
+            return None
+        tag = value.get(field, _MISSING) if isinstance(value, dict) else _MISSING
+        if tag is _MISSING:
+            s = untagged
+        else:
+            try:
+                s = tagged[tag]
+            except (KeyError, TypeError):
+                return error0(ty_tag, tag, [field])
+        return (yield s, value)
+
+    return step_tagged_union
+
+
+def _step_dataclass(kls: Type[Any], opts: _Options) -> NodeFn:
+    error0 = _error0(opts.quiet)
+    missing_key_error = _missing_key_error(opts.quiet)
+    fields: Optional[Dict[str, Step]] = None
+
+    def step_dataclass(value: V) -> Node:
+        nonlocal fields
+        if not isinstance(value, dict):
+            return error0(value=value, ty=dict)
+        if fields is None:
+            fields = {k: _compile_step(t, opts) for k, t in type_hints(kls).items()}
+        d: Dict[str, Any] = dict()
+        for k, v in value.items():
+            if not isinstance(k, str):
+                return error0(str, k)
+            s = fields.get(k)
+            if s is None:
+                return missing_key_error(kls, value, k)
+            v = (yield s, v) if s.nested else s.fn(v)
+            if isinstance(v, Error):
+                v.path.append(k)
+                return v
+            d[k] = v
+        try:
+            return kls(**d)
+        except Exception as e:
+            return error0(kls, value, exception=e)
+
+    return step_dataclass
+
+
+def _compile_dataclass(kls: Type[T], opts: _Options) -> Converter:
+    """Recursively constructs dataclass from dict
+
+    Fields are resolved on first use, so that recursive dataclasses can be compiled.
+    """
+    error0 = _error0(opts.quiet)
+    missing_key_error = _missing_key_error(opts.quiet)
+    fields: Optional[Dict[str, Converter]] = None
+
+    def into_dataclass(value: V) -> Result[T]:
+        nonlocal fields
+        if not isinstance(value, dict):
+            return error0(value=value, ty=dict)
+        if fields is None:
+            fields = _compile_fields(kls, opts)
+
+        # convert values into dastaclass recursively
+        d: Dict[str, Any] = dict()
+        for k, v in value.items():
+            if not isinstance(k, str):
+                return error0(str, k)
+            c = fields.get(k)
+            if c is None:
+                return missing_key_error(kls, value, k)
+            v = c(v)
+            if isinstance(v, Error):
+                v.path.append(k)
+                return v
+            d[k] = v
+        try:
+            return kls(**d)  # type: ignore
+        except Exception as e:
+            return error0(kls, value, exception=e)
+
+    max_errors = opts.max_errors
+
+    def collect_dataclass(value: V) -> Result[T]:
+        nonlocal fields
+        if not isinstance(value, dict):
+            return error0(value=value, ty=dict)
+        if fields is None:
+            fields = _compile_fields(kls, opts)
+
+        d: Dict[str, Any] = dict()
+        errors: List[Error] = []
+        for k, v in value.items():
+            if not isinstance(k, str):
+                errors.append(error0(str, k))
+            elif k not in fields:
+                errors.append(missing_key_error(kls, value, k))
+            else:
+                v = fields[k](v)
+                if isinstance(v, Error):
+                    _add_errors(errors, v, k)
+                else:
+                    d[k] = v
+            if len(errors) >= max_errors:
+                break
+        err = _aggregate(kls, value, errors, max_errors)
+        if err is not None:
+            return err
+        try:
+            return kls(**d)  # type: ignore
+        except Exception as e:
+            return error0(kls, value, exception=e)
+
+    if max_errors > 1:
+        return collect_dataclass
+    return into_dataclass
+
+
+def _compile_fields(kls: Type[Any], opts: _Options) -> Dict[str, Converter]:
+    fields: Dict[str, Type[Any]] = type_hints(kls)
+    converters = {k: _compile_into(ty, opts) for k, ty in fields.items()}
+    if opts.profile:
+        converters = {
+            k: _profile.instrument("into", kls, converter, k)
+            for k, converter in converters.items()
+        }
+    return converters
+
+
+def _generate_dataclass(kls: Type[T], opts: _Options) -> Converter:
+    """Generates a converter with straight-line field access, inline scalar type tests and
+    a direct constructor call.
+
+    The generated function handles dicts which have exactly the fields of `kls`.
+    Other inputs and any failure go to the generic converter, which reports the same errors
+    as the non-generated path.
+    Unlike `_compile_dataclass`, type hints (including forward references) are resolved here,
+    when the converter is compiled. Only the sub-converters are compiled on first call,
+    so that recursive dataclasses can be compiled.
+    """
+    fields: Dict[str, Type[Any]] = type_hints(kls)
+    slow = _compile_dataclass(kls, opts)
+    if not all(k.isidentifier() for k in fields):
+        return slow
+    ns: Dict[str, Any] = {
+        "_kls": kls,
+        "_Error": Error,
+        "_slow": slow,
+        "_keys": frozenset(fields),
+        "_unresolved": True,
+    }
+
+    def resolve():
+        for i, ty in enumerate(fields.values()):
+            ns[f"_into_{i}"] = _compile_into(ty, opts)
+        ns["_unresolved"] = False
+
+    ns["_resolve"] = resolve
+    body = [
+        "if _unresolved:",
+        "    _resolve()",
+        "if type(value) is not dict or value.keys() != _keys:",
+        "    return _slow(value)",
+    ]
+    for i, (k, ty) in enumerate(fields.items()):
+        v = f"v{i}"
+        body.append(f"{v} = value[{k!r}]")
+        lines = [
+            f"{v} = _into_{i}({v})",
+            f"if isinstance({v}, _Error):",
+            "    return _slow(value)",
+        ]
+        if _codegen.is_inline_type(ty):
+            ns[f"_t{i}"] = ty
+            body.append(f"if {_codegen.inline_test(v, ty, f'_t{i}')}:")
+            body.extend("    " + line for line in lines)
+        else:
+            body.extend(lines)
+    args = ", ".join(f"{k}=v{i}" for i, k in enumerate(fields))
+    body += [
+        "try:",
+        f"    return _kls({args})",
+        "except Exception:",
+        "    return _slow(value)",
+    ]
+    return _codegen.make_function("into_dataclass", body, ns)
@@ -0,0 +1,114 @@
+"""Read JSON and JSON Lines into dataclasses"""
+
+import json
+import os
+from typing import IO, Any, Iterator, List, Optional, Type, TypeVar, Union
+
+from dataclass_utils.batch import ErrorPolicy, _check_policy, _handle_error
+from dataclass_utils.error import Error, Error0
+from dataclass_utils.into_dataclass import Converter, Result, compile_into, into_root
+
+T = TypeVar("T")
+
+Source = Union[str, "os.PathLike[str]", IO[Any]]
+
+
+def loads_into(
+    data: Union[str, bytes, bytearray], kls: Type[T], *, max_errors: Optional[int] = 1
+) -> T:
+    """Convenience wrapper of `into(json.loads(data), kls)`, raising the error if fails
+
+    `data` is fully decoded by `json.loads` first, and unknown keys are errors as in `into`.
+    The decoded values are not shared with the caller, so lists and dicts which need no
+    conversion are adopted into the result rather than copied (see `compile_into`), which
+    lowers peak memory but hardly changes the time (see `benchmarks/bench.py`).
+    Invalid JSON is reported as `Error0` with the `json.JSONDecodeError` as `exception`.
+    For `max_errors`, see `into`.
+
+    >>> import dataclasses
+    >>> from typing import List
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: List[int]
+    >>> loads_into(b'{"a": [1, 2]}', Foo)
+    Foo(a=[1, 2])
+    """
+    try:
+        value = json.loads(data)
+    except ValueError as e:
+        raise Error0(kls, data, exception=e) from e
+    return into_root(value, kls, max_errors=max_errors, adopt=True)
+
+
+def read_jsonl(
+    source: Source,
+    kls: Type[T],
+    on_error: ErrorPolicy = "raise",
+    errors: Optional[List[Error]] = None,
+    buffer_size: int = 1 << 20,
+) -> Iterator[T]:
+    """Lazily reads JSON Lines from `source` (a path or a file object) and converts each line into `kls`.
+
+    Lines are read in chunks of about `buffer_size` bytes, so memory usage is bounded
+    regardless of the file size. Blank lines are skipped.
+    Errors have `index` set to the 1-based line number; lines which are not valid JSON
+    are reported as `Error0` with the `json.JSONDecodeError` as `exception`.
+    See `dataclass_utils.batch.ErrorPolicy` for `on_error`.
+
+    >>> import dataclasses, io
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: int
+    >>> f = io.StringIO('{"a": 1}\\n{"a": 2}\\n')
+    >>> list(read_jsonl(f, Foo))
+    [Foo(a=1), Foo(a=2)]
+    """
+    _check_policy(on_error, errors)
+    # decoded values are not shared with the caller, so containers can be adopted
+    converter = compile_into(kls, adopt=True)
+    return _read_jsonl(source, converter, kls, on_error, errors, buffer_size)
+
+
+def _read_jsonl(
+    source: Source,
+    converter: Converter,
+    kls: Type[T],
+    on_error: ErrorPolicy,
+    errors: Optional[List[Error]],
+    buffer_size: int,
+) -> Iterator[T]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _convert_lines(f, converter, kls, on_error, errors, buffer_size)
+    else:
+        yield from _convert_lines(source, converter, kls, on_error, errors, buffer_size)
+
+
+def _convert_lines(
+    f: IO[Any],
+    converter: Converter,
+    kls: Type[T],
+    on_error: ErrorPolicy,
+    errors: Optional[List[Error]],
+    buffer_size: int,
+) -> Iterator[T]:
+    lineno = 0
+    while True:
+        lines = f.readlines(buffer_size)
+        if not lines:
+            break
+        for line in lines:
+            lineno += 1
+            if not line.strip():
+                continue
+            ret: Result[T]
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                ret = Error0(kls, line, exception=e)
+            else:
+                ret = converter(value)
+            if isinstance(ret, Error):
+                _handle_error(ret, lineno, on_error, errors)
+            else:
+                yield ret
@@ -0,0 +1,289 @@
+"""Convert dataclass into dict, the reverse of `into`"""
+
+import dataclasses
+import itertools
+import json
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Type
+
+from dataclass_utils._internal.shared import (
+    SCALAR_TYPES,
+    SEQUENCE_ORIGINS,
+    NoneType,
+    type_hints,
+)
+from dataclass_utils.cache import LRUCache, register
+from dataclass_utils.typing import get_args, get_origin
+
+Serializer = Callable[[Any], Any]
+Streamer = Callable[[Any], Iterator[str]]
+
+# compiled serializers and streamers, keyed by (type, stream)
+_serializers: "LRUCache[Any, Any]" = register("from", LRUCache())
+
+# number of scalar items written at once by streamers
+_CHUNK_SIZE = 1024
+
+
+def from_dataclass(value: Any, kls: Optional[Type[Any]] = None) -> Any:
+    """Converts `value` of `kls` (defaults to its type) into plain dicts, lists and scalars,
+    which `into` converts back to an equal value.
+
+    Unlike `dataclasses.asdict`, nothing is deep-copied: fields are read along the
+    precompiled field table of `kls`, containers are rebuilt and scalars are shared.
+    Tuples, sets and sequences become lists.
+    Values typed as `Union` or `Any` are converted according to their runtime types.
+
+    >>> from typing import List, Optional
+    >>> from dataclass_utils import into
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: int
+    >>> @dataclasses.dataclass
+    ... class Bar:
+    ...     foos: List[Foo]
+    ...     b: Optional[Foo]
+    >>> bar = Bar([Foo(1)], None)
+    >>> from_dataclass(bar)
+    {'foos': [{'a': 1}], 'b': None}
+    >>> assert into(from_dataclass(bar), Bar) == bar
+    """
+    return compile_from(type(value) if kls is None else kls)(value)
+
+
+def compile_from(kls: Type[Any]) -> Serializer:
+    """Returns a serializer function for `kls`, which is built once and cached
+
+    >>> from typing import List
+    >>> compile_from(List[int])((1, 2))
+    [1, 2]
+    """
+    return _compile_from(kls, False)
+
+
+def iter_json(value: Any, kls: Optional[Type[Any]] = None) -> Iterator[str]:
+    """Lazily yields the JSON text of `from_dataclass(value, kls)` in chunks.
+
+    Dataclasses, lists and dicts are written item by item, so large containers are
+    never converted as a whole. The joined text is equal to `json.dumps(from_dataclass(value, kls))`.
+
+    >>> from typing import List
+    >>> "".join(iter_json([1, 2], List[int]))
+    '[1, 2]'
+    """
+    return _compile_from(type(value) if kls is None else kls, True)(value)
+
+
+def _compile_from(kls: Type[Any], stream: bool) -> Any:
+    key = (kls, stream)
+    try:
+        return _serializers.get(key)
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable type, which cannot be cached
+        return _compile_stream(kls) if stream else _compile(kls)
+    ret = _compile_stream(kls) if stream else _compile(kls)
+    return _serializers.put(key, ret)
+
+
+def _compile(kls: Type[Any]) -> Serializer:
+    if dataclasses.is_dataclass(kls):
+        return _compile_dataclass(kls)
+    to = get_origin(kls)
+    if to is not None:
+        args = get_args(kls)
+        if not args:
+            return _from_any
+        elif _is_items(to, args):
+            return _compile_items(args[0])
+        elif to is tuple:
+            return _compile_tuple(args)
+        elif to is dict:
+            return _compile_dict(args)
+        # e.g. Union, Literal
+        return _from_any
+    elif kls in SCALAR_TYPES or kls is NoneType or kls is None:
+        return _from_scalar
+    return _from_any
+
+
+def _is_items(to: Any, args: Tuple[Any, ...]) -> bool:
+    """Whether a generic type is a container of any number of `args[0]`"""
+    if to is tuple:
+        return len(args) == 2 and args[1] is ...
+    return to is list or to is set or to is frozenset or to in SEQUENCE_ORIGINS
+
+
+def _from_scalar(value: Any) -> Any:
+    return value
+
+
+def _from_any(value: Any) -> Any:
+    ty = type(value)
+    if ty in SCALAR_TYPES or value is None:
+        return value
+    elif dataclasses.is_dataclass(ty):
+        return _compile_from(ty, False)(value)
+    elif isinstance(value, dict):
+        return {_from_key(k): _from_any(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        return [_from_any(v) for v in value]
+    return value
+
+
+def _from_key(value: Any) -> Any:
+    """Same as `_from_any`, but tuples and frozensets are kept, so that dict keys stay
+    hashable (e.g. `Dict[Tuple[int, int], str]`)
+    """
+    if isinstance(value, tuple):
+        return tuple(_from_key(v) for v in value)
+    elif isinstance(value, frozenset):
+        return frozenset(_from_key(v) for v in value)
+    return _from_any(value)
+
+
+def _compile_key(kls: Type[Any]) -> Serializer:
+    """Returns a serializer for dict keys of `kls`"""
+    if _compile_from(kls, False) is _from_scalar:
+        return _from_scalar
+    return _from_key
+
+
+def _compile_items(item_ty: Type[Any]) -> Serializer:
+    from_item = _compile_from(item_ty, False)
+    if from_item is _from_scalar:
+        return list
+
+    def from_items(value: Any) -> Any:
+        return [from_item(v) for v in value]
+
+    return from_items
+
+
+def _compile_tuple(types: Tuple[Any, ...]) -> Serializer:
+    serializers = [_compile_from(t, False) for t in types]
+
+    def from_tuple(value: Any) -> Any:
+        return [s(v) for s, v in zip(serializers, value)]
+
+    return from_tuple
+
+
+def _compile_dict(types: Tuple[Any, ...]) -> Serializer:
+    from_key = _compile_key(types[0])
+    from_item = _compile_from(types[1], False)
+    if from_key is _from_scalar and from_item is _from_scalar:
+        return dict
+
+    def from_dict(value: Any) -> Any:
+        return {from_key(k): from_item(v) for k, v in value.items()}
+
+    return from_dict
+
+
+def _compile_dataclass(kls: Type[Any]) -> Serializer:
+    # resolved on first call, so that recursive dataclasses can be compiled
+    fields: Optional[List[Tuple[str, Serializer]]] = None
+
+    def from_dataclass(value: Any) -> Any:
+        nonlocal fields
+        if fields is None:
+            fields = [(k, _compile_from(t, False)) for k, t in _init_fields(kls)]
+        return {k: s(getattr(value, k)) for k, s in fields}
+
+    return from_dataclass
+
+
+def _init_fields(kls: Type[Any]) -> List[Tuple[str, Any]]:
+    """Returns the names and types of the fields which `into` passes to the constructor.
+
+    Class variables, init-only variables and `init=False` fields are omitted.
+    """
+    hints = type_hints(kls)
+    return [(f.name, hints[f.name]) for f in dataclasses.fields(kls) if f.init]
+
+
+def _compile_stream(kls: Type[Any]) -> Streamer:
+    if dataclasses.is_dataclass(kls):
+        return _compile_stream_dataclass(kls)
+    to = get_origin(kls)
+    if to is not None:
+        args = get_args(kls)
+        if args and _is_items(to, args):
+            return _compile_stream_items(args[0])
+        elif args and to is dict:
+            return _compile_stream_dict(args)
+    serialize = _compile_from(kls, False)
+
+    def stream_value(value: Any) -> Iterator[str]:
+        yield json.dumps(serialize(value))
+
+    return stream_value
+
+
+def _compile_stream_items(item_ty: Type[Any]) -> Streamer:
+    stream_item = _compile_from(item_ty, True)
+    from_item = _compile_from(item_ty, False)
+
+    def stream_items(value: Any) -> Iterator[str]:
+        yield "["
+        for i, v in enumerate(value):
+            if i:
+                yield ", "
+            yield from stream_item(v)
+        yield "]"
+
+    def stream_scalars(value: Any) -> Iterator[str]:
+        it = iter(value)
+        sep = ""
+        yield "["
+        while True:
+            chunk = list(itertools.islice(it, _CHUNK_SIZE))
+            if not chunk:
+                break
+            yield sep + json.dumps(chunk)[1:-1]
+            sep = ", "
+        yield "]"
+
+    if from_item is _from_scalar:
+        return stream_scalars
+    return stream_items
+
+
+def _compile_stream_dict(types: Tuple[Any, ...]) -> Streamer:
+    from_key = _compile_key(types[0])
+    stream_item = _compile_from(types[1], True)
+
+    def stream_dict(value: Any) -> Iterator[str]:
+        yield "{"
+        for i, (k, v) in enumerate(value.items()):
+            yield (", " if i else "") + _key_json(from_key(k)) + ": "
+            yield from stream_item(v)
+        yield "}"
+
+    return stream_dict
+
+
+def _key_json(key: Any) -> str:
+    # keys are converted into strings as `json.dumps` does (e.g. 1 -> "1")
+    return json.dumps({key: None})[1:-7]
+
+
+def _compile_stream_dataclass(kls: Type[Any]) -> Streamer:
+    # (name, JSON text of name, streamer)
+    fields: Optional[List[Tuple[str, str, Streamer]]] = None
+
+    def stream_dataclass(value: Any) -> Iterator[str]:
+        nonlocal fields
+        if fields is None:
+            fields = [
+                (k, json.dumps(k) + ": ", _compile_from(t, True))
+                for k, t in _init_fields(kls)
+            ]
+        yield "{"
+        for i, (k, text, s) in enumerate(fields):
+            yield (", " if i else "") + text
+            yield from s(getattr(value, k))
+        yield "}"
+
+    return stream_dataclass
@@ -1,11 +1,20 @@
+import contextvars
 import dataclasses
+import itertools
+import random
 import typing
+import weakref
 from typing import (
     Any,
+    Callable,
     Dict,
     FrozenSet,
+    Iterable,
     List,
+    Mapping,
+    NamedTuple,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Type,
@@ -16,11 +25,99 @@ from typing import (
 import typing_extensions
 from typing_extensions import TypedDict, TypeGuard
 
-from dataclass_utils._internal.shared import is_pep604_union
-from dataclass_utils.error import Error, Error0
+from dataclass_utils import profile as _profile
+from dataclass_utils._internal import codegen as _codegen
+from dataclass_utils._internal.iterative import Node, NodeFn, Step, run
+from dataclass_utils._internal.shared import (
+    BUFFER_TYPES,
+    SCALAR_TYPES,
+    SEQUENCE_ORIGINS,
+    Discriminator,
+    buffer_item_type,
+    find_discriminator,
+    is_opaque_buffer,
+    is_pep604_union,
+    literal_test,
+    type_hints,
+    type_table,
+)
+from dataclass_utils.cache import LRUCache, register
+from dataclass_utils.error import (
+    AggregateError,
+    Error,
+    Error0,
+    _add_errors,
+    _aggregate,
+    _error0,
+    _max_errors,
+)
 from dataclass_utils.typing import Literal, get_args, get_origin
 
 Result = Optional[Error]  # returns error context
+Checker = Callable[[Any], Result]
+
+
+@dataclasses.dataclass(frozen=True)
+class ContainerPolicy:
+    """Which elements of containers (`List`, `Set`, `Dict`, `Tuple[T, ...]` etc.) to check
+
+    - "all": every element
+    - "head": the first `n` elements
+    - "sample": `n` elements chosen at random (the first `n` for unordered containers)
+    - "none": no element, only the container type
+
+    It can be set globally with `set_container_policy`, or per field with
+    `dataclasses.field(metadata={"container_policy": ContainerPolicy(...)})`.
+    A field's policy applies to all containers in the field's type,
+    but not to the fields of nested dataclasses.
+    """
+
+    mode: Literal["all", "head", "sample", "none"] = "all"
+    n: int = 0
+
+    def __post_init__(self):
+        if self.mode not in ("all", "head", "sample", "none"):
+            raise ValueError(f"Invalid container policy mode: {self.mode}")
+        if self.n < 0:
+            raise ValueError(f"`n` must not be negative, got {self.n}")
+
+
+POLICY_KEY = "container_policy"  # key of the field metadata
+_default_policy = ContainerPolicy()
+
+
+class _Options(NamedTuple):
+    codegen: bool
+    policy: ContainerPolicy
+    incremental: bool = False
+    max_errors: int = 1
+    # only pass or fail matters, so errors are not built (e.g. in `Union` members)
+    quiet: bool = False
+    # nodes are wrapped to record calls and time (see `dataclass_utils.profile`)
+    profile: bool = False
+    # nested values are checked with an explicit stack (see `_compile_step`)
+    iterative: bool = False
+    # dataclass instances are checked once per call (see `_compile_graph`)
+    graph: bool = False
+    # policy of dataclass fields without their own policy
+    default_policy: ContainerPolicy = ContainerPolicy()
+    # items of containers are checked in slices of this size (see `_step_slices`)
+    slice_size: int = 0
+
+
+# compiled checkers, keyed by (type, options)
+_checkers: "LRUCache[Any, Checker]" = register("check", LRUCache())
+# compiled steps of the iterative engine, keyed by (type, options)
+_steps: "LRUCache[Any, Step]" = register("check_step", LRUCache())
+
+
+def set_container_policy(policy: ContainerPolicy):
+    """Sets the default `ContainerPolicy` for fields without their own policy"""
+    global _default_policy
+    _default_policy = policy
+    # compiled plans have the old default baked in
+    _checkers.clear()
+    _steps.clear()
 
 
 def check(value: Any, ty: Type[Any]) -> Result:
@@ -34,44 +131,175 @@ def check(value: Any, ty: Type[Any]) -> Result:
     >>> assert is_error(check(1.3, int))
     >>> assert is_error(check(1.3, Union[str, int]))
     """
-    if not isinstance(value, type) and dataclasses.is_dataclass(ty):
-        # dataclass
-        return check_dataclass(value, ty)
+    return compile_check(ty)(value)
+
+
+def compile_check(
+    ty: Type[Any],
+    *,
+    codegen: bool = False,
+    policy: Optional[ContainerPolicy] = None,
+    incremental: bool = False,
+    max_errors: Optional[int] = 1,
+    iterative: bool = False,
+    graph: bool = False,
+) -> Checker:
+    """Returns a checker function for `ty`, which is built once and cached.
+
+    All type introspection is done here, so the returned function only runs the precompiled plan.
+    With `codegen=True`, dataclasses are checked by functions generated from source,
+    which access fields and test scalar types inline.
+    `policy` applies to the containers in `ty`, including the fields of dataclasses in it
+    which have no policy of their own, and defaults to the global `ContainerPolicy`.
+    With `incremental=True`, see `_compile_incremental`.
+    If `max_errors` is not 1, the checker goes on after errors, and returns up to `max_errors`
+    errors (all of them if None) as an `AggregateError`. Dataclasses are not generated from
+    source in this mode.
+    With `iterative=True`, nested dataclasses and containers are checked with an explicit
+    stack instead of recursive calls, so that arbitrarily deep values don't raise
+    `RecursionError`. Errors are the same as the recursive ones.
+    It cannot be combined with `incremental` or `max_errors`.
+    With `graph=True`, each dataclass instance is checked once per call however many times
+    it is referenced, and reference cycles terminate (see `_compile_graph`).
+    It cannot be combined with `iterative`.
+
+    >>> checker = compile_check(List[int])
+    >>> assert not is_error(checker([1, 2]))
+    >>> assert is_error(checker([1, "a"]))
+    >>> assert checker is compile_check(List[int])
+    >>> assert not is_error(compile_check(List[int], policy=ContainerPolicy("head", 1))([1, "a"]))
+    """
+    policy = policy or _default_policy
+    opts = _Options(
+        codegen,
+        policy,
+        incremental,
+        _max_errors(max_errors),
+        profile=_profile.is_enabled(),
+        iterative=iterative,
+        graph=graph,
+        default_policy=policy,
+    )
+    if iterative:
+        if incremental or graph or opts.max_errors != 1:
+            raise ValueError(
+                "`iterative` cannot be combined with "
+                "`incremental`, `graph` or `max_errors`"
+            )
+        step = _compile_step(ty, opts)
+        return lambda value: run(step, value)
+    checker = _compile_check(ty, opts)
+    if graph:
+        return _graph_root(checker)
+    return checker
+
+
+def _compile_check(ty: Type[Any], opts: _Options) -> Checker:
+    key = (ty, opts)
+    try:
+        return _checkers.get(key)
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable type, which cannot be cached
+        return _compile(ty, opts)
+    checker = _compile(ty, opts)
+    return _checkers.put(key, checker)
+
+
+def _compile(ty: Type[Any], opts: _Options) -> Checker:
+    checker = _compile_node(ty, opts)
+    if opts.profile:
+        return _profile.instrument("check", ty, checker)
+    return checker
+
+
+def _compile_node(ty: Type[Any], opts: _Options) -> Checker:
+    if dataclasses.is_dataclass(ty):
+        # generated functions have no per field nodes to profile
+        if opts.codegen and opts.max_errors == 1 and not opts.profile:
+            checker = _generate_dataclass(ty, opts)
+        else:
+            checker = _compile_dataclass(ty, opts)
+        if opts.incremental and ty.__dataclass_params__.frozen:  # type: ignore
+            checker = _compile_incremental(ty, checker)
+        if opts.graph:
+            return _compile_graph(ty, checker)
+        return checker
     elif is_typeddict(ty):
         # should use `typing.is_typeddict` in future
-        return check_typeddict(value, ty)
+        return _compile_typeddict(ty, opts)
+    to = get_origin(ty)
+    if to is not None:
+        # generics
+        return _compile_generic(ty, to, opts)
+    elif ty is Any:
+        return _check_any
+    elif isinstance(ty, type):
+        # concrete type
+        if is_pep604_union(ty):
+            return _check_any
+        elif issubclass(ty, bool):
+            return _compile_instance(ty, opts)
+        elif issubclass(ty, int):  # For boolean
+            return _compile_int(ty, opts)
+        else:
+            return _compile_instance(ty, opts)
+    return _check_any
+
+
+def _check_any(value: Any) -> Result:
+    return None
+
+
+def _compile_instance(ty: Type[Any], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
+
+    def check_instance(value: Any) -> Result:
+        if not isinstance(value, ty):
+            return error0(ty=ty, value=value)
+        return None
+
+    return check_instance
+
+
+def _compile_generic(ty: Type[Any], to: Any, opts: _Options) -> Checker:
+    check_origin = _compile_check(to, opts)
+    args = get_args(ty)
+    # `Tuple[()]` has no args too, but only accepts empty tuples
+    if not args and not (to is tuple and ty is not Tuple):
+        return check_origin
+
+    if to is list or to is set or to is frozenset or to in SEQUENCE_ORIGINS:
+        check_items = _compile_mono_container(ty, opts)
+    elif to is dict:
+        check_items = _compile_dict(ty, opts)
+    elif to is tuple:
+        check_items = _compile_tuple(ty, opts)
+    elif to is Literal:
+        check_items = _compile_literal(ty, opts)
+    elif to is Union or is_pep604_union(to):
+        check_items = _compile_union(ty, opts)
     else:
-        to = get_origin(ty)
-        if to is not None:
-            # generics
-            err = check(value, to)
-            if is_error(err):
-                return err
+        return check_origin
 
-            if to is list or to is set or to is frozenset:
-                err = check_mono_container(value, ty)
-            elif to is dict:
-                err = check_dict(value, ty)  # type: ignore
-            elif to is tuple:
-                err = check_tuple(value, ty)
-            elif to is Literal:
-                err = check_literal(value, ty)
-            elif to is Union or is_pep604_union(to):
-                err = check_union(value, ty)
+    def check_generic(value: Any) -> Result:
+        err = check_origin(value)
+        if err is not None:
             return err
-        elif isinstance(ty, type):
-            # concrete type
-            if is_pep604_union(ty):
-                pass
-            elif issubclass(ty, bool):
-                if not isinstance(value, ty):
-                    return Error0(ty=ty, value=value)
-            elif issubclass(ty, int):  # For boolean
-                return check_int(value, ty)
-            elif not isinstance(value, ty):
-                return Error0(ty=ty, value=value)
+        return check_items(value)
 
-    return None
+    if to in SEQUENCE_ORIGINS:
+        error0 = _error0(opts.quiet)
+
+        def check_sequence(value: Any) -> Result:
+            # iterating it would raise `NotImplementedError`
+            if is_opaque_buffer(value):
+                return error0(ty=ty, value=value)
+            return check_generic(value)
+
+        return check_sequence
+    return check_generic
 
 
 def check_int(value: Any, ty: Type[Any]) -> Result:
@@ -80,91 +308,858 @@ def check_int(value: Any, ty: Type[Any]) -> Result:
     return None
 
 
+def _compile_int(ty: Type[Any], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
+
+    def check_int(value: Any) -> Result:
+        if isinstance(value, bool) or not isinstance(value, ty):
+            return error0(ty=ty, value=value)
+        return None
+
+    return check_int
+
+
 def check_literal(value: Any, ty: Type[Any]) -> Result:
-    if all(value != t for t in get_args(ty)):
-        return Error0(ty=ty, value=value)
-    return None
+    return compile_check(ty)(value)
+
+
+def _compile_literal(ty: Type[Any], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
+    is_literal = literal_test(get_args(ty))
+
+    def check_literal(value: Any) -> Result:
+        if not is_literal(value):
+            return error0(ty=ty, value=value)
+        return None
+
+    return check_literal
 
 
 def check_tuple(value: Any, ty: Type[Tuple[Any, ...]]) -> Result:
+    return compile_check(ty)(value)
+
+
+def _compile_tuple(ty: Type[Tuple[Any, ...]], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
     types = get_args(ty)
     if len(types) == 2 and types[1] == ...:
         # arbitrary length tuple (e.g. Tuple[int, ...])
-        for v in value:
-            err = check(v, types[0])
-            if is_error(err):
+        check_item = _compile_check(types[0], opts)
+        select = _compile_select(opts.policy)
+        if opts.max_errors > 1:
+            return _collect_items(ty, check_item, select, opts.max_errors)
+        return _check_items(types[0], check_item, select, opts)
+
+    checkers = [_compile_check(t, opts) for t in types]
+    n = len(checkers)
+    max_errors = opts.max_errors
+
+    def check_tuple(value: Any) -> Result:
+        if len(value) != n:
+            return error0(ty=ty, value=value)
+        for v, c in zip(value, checkers):
+            err = c(v)
+            if err is not None:
                 return err
         return None
 
-    if len(value) != len(types):
-        return Error0(ty=ty, value=value)
-    for v, t in zip(value, types):
-        err = check(v, t)
-        if is_error(err):
-            return err
-    return None
+    def collect_tuple(value: Any) -> Result:
+        if len(value) != n:
+            return error0(ty=ty, value=value)
+        errors: List[Error] = []
+        for v, c in zip(value, checkers):
+            err = c(v)
+            if err is not None:
+                _add_errors(errors, err)
+                if len(errors) >= max_errors:
+                    break
+        return _aggregate(ty, value, errors, max_errors)
+
+    if max_errors > 1:
+        return collect_tuple
+
+    return check_tuple
 
 
 def check_union(value: Any, ty: Type[Any]) -> Result:
-    if any(not is_error(check(value, t)) for t in get_args(ty)):
+    return compile_check(ty)(value)
+
+
+def _compile_union(ty: Type[Any], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
+    # only whether each member passes matters
+    member_opts = opts._replace(max_errors=1, quiet=True)
+    members = get_args(ty)
+    checkers = [_compile_check(t, member_opts) for t in members]
+    # members to try for each exact value type
+    table = type_table([(_accepted_types(t), c) for t, c in zip(members, checkers)])
+
+    def check_union(value: Any) -> Result:
+        for c in table.get(type(value), checkers):
+            if c(value) is None:
+                return None
+        return error0(ty=ty, value=value)
+
+    discriminator = find_discriminator(get_args(ty))
+    if discriminator is not None:
+        return _compile_tagged_union(discriminator, check_union, opts)
+    return check_union
+
+
+def _accepted_types(ty: Type[Any]) -> Optional[Tuple[type, ...]]:
+    """Returns the types whose instances may pass the checker of `ty`, or None if unknown"""
+    if dataclasses.is_dataclass(ty):
+        # any dataclass instance may pass
         return None
-    return Error0(ty=ty, value=value)
+    elif is_typeddict(ty):
+        return (dict,)
+    to = get_origin(ty)
+    if to is not None:
+        return (to,) if isinstance(to, type) else None
+    elif ty is Any or not isinstance(ty, type) or is_pep604_union(ty):
+        return None
+    return (ty,)
+
+
+_MISSING = object()
+
+
+def _compile_tagged_union(
+    discriminator: Discriminator, check_union: Checker, opts: _Options
+) -> Checker:
+    """Checks a value of `Union` of dataclasses with the member which its tag selects.
+
+    Values without the tag field are checked with `check_union`.
+    """
+    error0 = _error0(opts.quiet)
+    field, ty_tag = discriminator.field, discriminator.ty
+    optional = discriminator.optional
+    table = {k: _compile_check(t, opts) for k, t in discriminator.members.items()}
+
+    def check_tagged_union(value: Any) -> Result:
+        if value is None and optional:
+            return None
+        tag = getattr(value, field, _MISSING)
+        if tag is _MISSING:
+            return check_union(value)
+        try:
+            check_member = table[tag]
+        except (KeyError, TypeError):
+            return error0(ty_tag, tag, [field])
+        return check_member(value)
+
+    return check_tagged_union
 
 
 def check_mono_container(
     value: Any, ty: Union[Type[List[Any]], Type[Set[Any]], Type[FrozenSet[Any]]]
 ) -> Result:
-    ty_item = get_args(ty)[0]
-    for v in value:
-        err = check(v, ty_item)
-        if is_error(err):
-            return err
-    return None
+    return compile_check(ty)(value)
+
+
+def _compile_mono_container(
+    ty: Union[Type[List[Any]], Type[Set[Any]], Type[FrozenSet[Any]]], opts: _Options
+) -> Checker:
+    check_item = _compile_check(get_args(ty)[0], opts)
+    select = _compile_select(opts.policy)
+    if opts.max_errors > 1:
+        return _collect_items(ty, check_item, select, opts.max_errors)
+    return _check_items(get_args(ty)[0], check_item, select, opts)
+
+
+def _check_items(
+    item_ty: Type[Any],
+    check_item: Checker,
+    select: Callable[[Iterable[Any]], Iterable[Any]],
+    opts: _Options,
+) -> Checker:
+    def check_items(value: Any) -> Result:
+        for v in select(value):
+            err = check_item(v)
+            if err is not None:
+                return err
+        return None
+
+    # profiled plans record every item
+    if select is _select_all and item_ty in SCALAR_TYPES and not opts.profile:
+        return _check_scalar_items(item_ty, check_items)
+    return check_items
+
+
+def _check_scalar_items(item_ty: Type[Any], check_items: Checker) -> Checker:
+    """Collects the exact types of all items in one pass, and tests each distinct type once.
+
+    The item type of buffers (e.g. `array.array`, `memoryview`) is read from their format.
+    `check_items` is only run to locate the failing item.
+    """
+    accepted = {item_ty}
+    exclude_bool = item_ty is int  # as in `check_int`
+
+    def check_scalar_items(value: Any) -> Result:
+        t = buffer_item_type(value) if type(value) in BUFFER_TYPES else None
+        types = {t} if t is not None else set(map(type, value))
+        if types <= accepted:
+            return None
+        for t in types - accepted:
+            if not issubclass(t, item_ty) or (exclude_bool and issubclass(t, bool)):
+                return check_items(value)
+        return None
+
+    return check_scalar_items
+
+
+def _collect_items(
+    ty: Type[Any],
+    check_item: Checker,
+    select: Callable[[Iterable[Any]], Iterable[Any]],
+    max_errors: int,
+) -> Checker:
+    def collect_items(value: Any) -> Result:
+        errors: List[Error] = []
+        for v in select(value):
+            err = check_item(v)
+            if err is not None:
+                _add_errors(errors, err)
+                if len(errors) >= max_errors:
+                    break
+        return _aggregate(ty, value, errors, max_errors)
+
+    return collect_items
 
 
 def check_dict(value: Dict[Any, Any], ty: Type[Dict[Any, Any]]) -> Result:
+    return compile_check(ty)(value)
+
+
+def _compile_dict(ty: Type[Dict[Any, Any]], opts: _Options) -> Checker:
     args = get_args(ty)
-    ty_key = args[0]
-    ty_item = args[1]
-    for k, v in value.items():
-        err = check(k, ty_key)
-        if is_error(err):
+    check_key = _compile_check(args[0], opts)
+    check_item = _compile_check(args[1], opts)
+    select = _compile_select(opts.policy)
+    max_errors = opts.max_errors
+
+    def check_dict(value: Dict[Any, Any]) -> Result:
+        for k, v in select(value.items()):
+            err = check_key(k)
+            if err is not None:
+                return err
+            err = check_item(v)
+            if err is not None:
+                err.path.append(k)
+                return err
+        return None
+
+    def collect_dict(value: Dict[Any, Any]) -> Result:
+        errors: List[Error] = []
+        for k, v in select(value.items()):
+            err = check_key(k)
+            if err is not None:
+                _add_errors(errors, err)
+            err = check_item(v)
+            if err is not None:
+                _add_errors(errors, err, k)
+            if len(errors) >= max_errors:
+                break
+        return _aggregate(ty, value, errors, max_errors)
+
+    if max_errors > 1:
+        return collect_dict
+
+    return check_dict
+
+
+def check_dataclass(value: Any, ty: Type[Any]) -> Result:
+    return compile_check(ty)(value)
+
+
+def _compile_dataclass(ty: Type[Any], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
+    # Fields are resolved on first use, so that forward references and
+    # recursive types are resolved lazily as before.
+    fields: Optional[List[Tuple[str, Checker]]] = None
+
+    def check_dataclass(value: Any) -> Result:
+        nonlocal fields
+        if isinstance(value, type) or not dataclasses.is_dataclass(value):
+            return error0(ty, value)
+        if fields is None:
+            fields = _compile_fields(ty, opts)
+        for k, c in fields:
+            err = c(getattr(value, k))
+            if err is not None:
+                err.path.append(k)
+                return err
+        return None
+
+    max_errors = opts.max_errors
+
+    def collect_dataclass(value: Any) -> Result:
+        nonlocal fields
+        if isinstance(value, type) or not dataclasses.is_dataclass(value):
+            return error0(ty, value)
+        if fields is None:
+            fields = _compile_fields(ty, opts)
+        errors: List[Error] = []
+        for k, c in fields:
+            err = c(getattr(value, k))
+            if err is not None:
+                _add_errors(errors, err, k)
+                if len(errors) >= max_errors:
+                    break
+        return _aggregate(ty, value, errors, max_errors)
+
+    if max_errors > 1:
+        return collect_dataclass
+    return check_dataclass
+
+
+def check_typeddict(value: Any, ty: Type[Type[Any]]) -> Result:
+    return compile_check(ty)(value)
+
+
+def _compile_typeddict(ty: Type[Any], opts: _Options) -> Checker:
+    error0 = _error0(opts.quiet)
+    is_total: bool = ty.__total__  # type: ignore
+    fields: Optional[List[Tuple[str, Checker]]] = None
+
+    def check_typeddict(value: Any) -> Result:
+        nonlocal fields
+        if not isinstance(value, dict):
+            return error0(ty, value)
+        if fields is None:
+            fields = _compile_fields(ty, opts)
+        for k, c in fields:
+            if k not in value:
+                if is_total:
+                    return error0(ty, value, [k])
+                else:
+                    continue
+            err = c(value[k])
+            if err is not None:
+                err.path.append(k)
+                return err
+        return None
+
+    max_errors = opts.max_errors
+
+    def collect_typeddict(value: Any) -> Result:
+        nonlocal fields
+        if not isinstance(value, dict):
+            return error0(ty, value)
+        if fields is None:
+            fields = _compile_fields(ty, opts)
+        errors: List[Error] = []
+        for k, c in fields:
+            if k not in value:
+                if is_total:
+                    errors.append(error0(ty, value, [k]))
+            else:
+                err = c(value[k])
+                if err is not None:
+                    _add_errors(errors, err, k)
+            if len(errors) >= max_errors:
+                break
+        return _aggregate(ty, value, errors, max_errors)
+
+    if max_errors > 1:
+        return collect_typeddict
+    return check_typeddict
+
+
+def _compile_select(
+    policy: ContainerPolicy,
+) -> Callable[[Iterable[Any]], Iterable[Any]]:
+    """Returns a function which selects the elements to check according to `policy`"""
+    n = policy.n
+    if policy.mode == "all":
+        return _select_all
+    elif policy.mode == "none":
+        return _select_none
+
+    def select_head(value: Iterable[Any]) -> Iterable[Any]:
+        return itertools.islice(value, n)
+
+    if policy.mode == "head":
+        return select_head
+
+    def select_sample(value: Iterable[Any]) -> Iterable[Any]:
+        if not isinstance(value, Sequence):
+            return select_head(value)
+        if len(value) <= n:
+            return value
+        return (value[i] for i in random.sample(range(len(value)), n))
+
+    return select_sample
+
+
+def _select_all(value: Iterable[Any]) -> Iterable[Any]:
+    return value
+
+
+def _select_none(value: Iterable[Any]) -> Iterable[Any]:
+    return ()
+
+
+def _compile_fields(ty: Type[Any], opts: _Options) -> List[Tuple[str, Checker]]:
+    fields = [
+        (k, _compile_check(t, field_opts))
+        for k, t, field_opts in _field_options(ty, opts)
+    ]
+    if opts.profile:
+        fields = [
+            (k, _profile.instrument("check", ty, checker, k)) for k, checker in fields
+        ]
+    return fields
+
+
+def _field_options(
+    ty: Type[Any], opts: _Options
+) -> List[Tuple[str, Type[Any], _Options]]:
+    """Resolves type hints of `ty`, and the options to compile each field with"""
+    hints = type_hints(ty)
+    metadata: Dict[str, Mapping[str, Any]] = {}
+    if dataclasses.is_dataclass(ty):
+        metadata = {f.name: f.metadata for f in dataclasses.fields(ty)}
+    ret = []
+    for k, t in hints.items():
+        policy = metadata.get(k, {}).get(POLICY_KEY, opts.default_policy)
+        ret.append((k, t, opts._replace(policy=policy)))
+    return ret
+
+
+def _generate_dataclass(ty: Type[Any], opts: _Options) -> Checker:
+    """Generates a checker with straight-line field access and inline scalar type tests.
+
+    Unlike `_compile_dataclass`, type hints (including forward references) are resolved here,
+    when the checker is compiled. Only the sub-checkers are compiled on first call,
+    so that recursive types can be compiled.
+    """
+    fields = _field_options(ty, opts)
+    ns: Dict[str, Any] = {
+        "_ty": ty,
+        "_Error0": _error0(opts.quiet),
+        "_is_dataclass": dataclasses.is_dataclass,
+        "_unresolved": True,
+    }
+
+    def resolve():
+        for i, (_, t, opts) in enumerate(fields):
+            ns[f"_check_{i}"] = _compile_check(t, opts)
+        ns["_unresolved"] = False
+
+    ns["_resolve"] = resolve
+    body = [
+        "if _unresolved:",
+        "    _resolve()",
+        "if isinstance(value, type) or not _is_dataclass(value):",
+        "    return _Error0(_ty, value)",
+    ]
+    for i, (k, t, _) in enumerate(fields):
+        if k.isidentifier():
+            body.append(f"v = value.{k}")
+        else:
+            body.append(f"v = getattr(value, {k!r})")
+        lines = [
+            f"err = _check_{i}(v)",
+            "if err is not None:",
+            f"    err.path.append({k!r})",
+            "    return err",
+        ]
+        if _codegen.is_inline_type(t):
+            ns[f"_t{i}"] = t
+            body.append(f"if {_codegen.inline_test('v', t, f'_t{i}')}:")
+            body.extend("    " + line for line in lines)
+        else:
+            body.extend(lines)
+    body.append("return None")
+    return _codegen.make_function("check_dataclass", body, ns)
+
+
+def _root_step(ty: Type[Any], slice_size: int = 0) -> Step:
+    """Returns the step which `compile_check(ty, iterative=True)` runs.
+
+    With `slice_size`, containers are also walked in slices (see `_step_slices`).
+    """
+    opts = _Options(
+        False,
+        _default_policy,
+        profile=_profile.is_enabled(),
+        iterative=True,
+        default_policy=_default_policy,
+        slice_size=slice_size,
+    )
+    return _compile_step(ty, opts)
+
+
+def _compile_step(ty: Type[Any], opts: _Options) -> Step:
+    """Same as `_compile_check`, but for `dataclass_utils._internal.iterative.run`
+
+    Dataclasses, TypedDicts, and containers and unions which contain them are nested steps,
+    which yield their items instead of calling checkers. Other types are checked by the
+    recursive checkers, which don't nest, except that other containers yield slices of
+    their items if `opts.slice_size` is set.
+    """
+    key = (ty, opts)
+    try:
+        return _steps.get(key)
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable type, which cannot be cached
+        return _step(ty, opts)
+    step = _step(ty, opts)
+    return _steps.put(key, step)
+
+
+def _step(ty: Type[Any], opts: _Options) -> Step:
+    if dataclasses.is_dataclass(ty):
+        return Step(_step_dataclass(ty, opts), True)
+    elif is_typeddict(ty):
+        return Step(_step_typeddict(ty, opts), True)
+    to = get_origin(ty)
+    args = get_args(ty)
+    node: Optional[NodeFn] = None
+    if to is not None and args:
+        if to is list or to is set or to is frozenset or to in SEQUENCE_ORIGINS:
+            node = _step_items(to, args[0], opts) or _step_slices(ty, opts)
+        elif to is tuple and len(args) == 2 and args[1] == ...:
+            node = _step_items(to, args[0], opts) or _step_slices(ty, opts)
+        elif to is tuple:
+            node = _step_tuple(ty, opts)
+        elif to is dict:
+            node = _step_dict(args, opts) or _step_slices(ty, opts)
+        elif to is Union or is_pep604_union(to):
+            node = _step_union(ty, opts)
+    if node is None:
+        return Step(_compile_check(ty, opts._replace(iterative=False)), False)
+    return Step(node, True)
+
+
+def _step_items(to: Any, item_ty: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    item = _compile_step(item_ty, opts)
+    if not item.nested:
+        return None
+    check_origin = _compile_check(to, opts._replace(iterative=False))
+    select = _compile_select(opts.policy)
+
+    def step_items(value: Any) -> Node:
+        err = check_origin(value)
+        if err is not None:
             return err
-        err = check(v, ty_item)
+        if is_opaque_buffer(value):
+            return error0(ty=to, value=value)
+        for v in select(value):
+            err = yield item, v
+            if err is not None:
+                return err
+        return None
+
+    return step_items
+
+
+def _step_slices(ty: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    """Checks the items of a container whose items don't nest in slices of
+    `opts.slice_size`, so that `run_async` can yield between them.
+
+    Buffers are checked at once by their format.
+    """
+    n = opts.slice_size
+    if not n:
+        return None
+    flat = opts._replace(iterative=False, slice_size=0)
+    to = get_origin(ty)
+    assert to is not None
+    args = get_args(ty)
+    check_whole = _compile_check(ty, flat)
+    check_origin = _compile_check(to, flat)
+    select = _compile_select(opts.policy)
+    check_slice: Checker
+    if to is dict:
+        check_key = _compile_check(args[0], flat)
+        check_item = _compile_check(args[1], flat)
+
+        def check_pairs(value: Any) -> Result:
+            for k, v in value:
+                err = check_key(k)
+                if err is not None:
+                    return err
+                err = check_item(v)
+                if err is not None:
+                    err.path.append(k)
+                    return err
+            return None
+
+        check_slice = check_pairs
+    else:
+        # the items are already selected
+        check_item = _compile_check(args[0], flat)
+        check_slice = _check_items(args[0], check_item, _select_all, flat)
+    slice_step = Step(check_slice, False, sliced=True)
+
+    def step_slices(value: Any) -> Node:
+        if type(value) in BUFFER_TYPES:
+            return check_whole(value)
+        err = check_origin(value)
         if err is not None:
-            err.path.append(k)
             return err
-    return None
+        items = iter(select(value.items() if to is dict else value))
+        while True:
+            chunk = list(itertools.islice(items, n))
+            if not chunk:
+                return None
+            err = yield slice_step, chunk
+            if err is not None:
+                return err
 
+    return step_slices
 
-def check_dataclass(value: Any, ty: Type[Any]) -> Result:
-    if not dataclasses.is_dataclass(value):
-        return Error0(ty, value)
-    for k, ty in typing.get_type_hints(ty).items():
-        v = getattr(value, k)
-        err = check(v, ty)
+
+def _step_tuple(ty: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    steps = [_compile_step(t, opts) for t in get_args(ty)]
+    if not any(s.nested for s in steps):
+        return None
+    check_origin = _compile_check(tuple, opts._replace(iterative=False))
+    n = len(steps)
+
+    def step_tuple(value: Any) -> Node:
+        err = check_origin(value)
         if err is not None:
-            err.path.append(k)
             return err
-    return None
+        if len(value) != n:
+            return error0(ty=ty, value=value)
+        for v, s in zip(value, steps):
+            err = (yield s, v) if s.nested else s.fn(v)
+            if err is not None:
+                return err
+        return None
 
+    return step_tuple
 
-def check_typeddict(value: Any, ty: Type[Type[Any]]) -> Result:
-    if not isinstance(value, dict):
-        return Error0(ty, value)
+
+def _step_dict(args: Tuple[Any, ...], opts: _Options) -> Optional[NodeFn]:
+    key = _compile_step(args[0], opts)
+    item = _compile_step(args[1], opts)
+    if not (key.nested or item.nested):
+        return None
+    check_origin = _compile_check(dict, opts._replace(iterative=False))
+    select = _compile_select(opts.policy)
+
+    def step_dict(value: Any) -> Node:
+        err = check_origin(value)
+        if err is not None:
+            return err
+        for k, v in select(value.items()):
+            err = (yield key, k) if key.nested else key.fn(k)
+            if err is not None:
+                return err
+            err = (yield item, v) if item.nested else item.fn(v)
+            if err is not None:
+                err.path.append(k)
+                return err
+        return None
+
+    return step_dict
+
+
+def _step_union(ty: Type[Any], opts: _Options) -> Optional[NodeFn]:
+    error0 = _error0(opts.quiet)
+    member_opts = opts._replace(max_errors=1, quiet=True)
+    members = get_args(ty)
+    steps = [_compile_step(t, member_opts) for t in members]
+    if not any(s.nested for s in steps):
+        return None
+    table = type_table([(_accepted_types(t), s) for t, s in zip(members, steps)])
+
+    def step_union(value: Any) -> Node:
+        for s in table.get(type(value), steps):
+            err = (yield s, value) if s.nested else s.fn(value)
+            if err is None:
+                return None
+        return error0(ty=ty, value=value)
+
+    discriminator = find_discriminator(members)
+    if discriminator is None:
+        return step_union
+    field, ty_tag = discriminator.field, discriminator.ty
+    optional = discriminator.optional
+    tagged = {k: _compile_step(t, opts) for k, t in discriminator.members.items()}
+    untagged = Step(step_union, True)
+
+    def step_tagged_union(value: Any) -> Node:
+        # see `_compile_tagged_union`
+        if value is None and optional:
+            return None
+        tag = getattr(value, field, _MISSING)
+        if tag is _MISSING:
+            s = untagged
+        else:
+            try:
+                s = tagged[tag]
+            except (KeyError, TypeError):
+                return error0(ty_tag, tag, [field])
+        return (yield s, value)
+
+    return step_tagged_union
+
+
+def _step_dataclass(ty: Type[Any], opts: _Options) -> NodeFn:
+    error0 = _error0(opts.quiet)
+    fields: Optional[List[Tuple[str, Step]]] = None
+
+    def step_dataclass(value: Any) -> Node:
+        nonlocal fields
+        if isinstance(value, type) or not dataclasses.is_dataclass(value):
+            return error0(ty, value)
+        if fields is None:
+            fields = [(k, _compile_step(t, o)) for k, t, o in _field_options(ty, opts)]
+        for k, s in fields:
+            v = getattr(value, k)
+            err = (yield s, v) if s.nested else s.fn(v)
+            if err is not None:
+                err.path.append(k)
+                return err
+        return None
+
+    return step_dataclass
+
+
+def _step_typeddict(ty: Type[Any], opts: _Options) -> NodeFn:
+    error0 = _error0(opts.quiet)
     is_total: bool = ty.__total__  # type: ignore
-    for k, ty in typing.get_type_hints(ty).items():
-        if k not in value:
-            if is_total:
-                return Error0(ty, value, [k])
-            else:
+    fields: Optional[List[Tuple[str, Step]]] = None
+
+    def step_typeddict(value: Any) -> Node:
+        nonlocal fields
+        if not isinstance(value, dict):
+            return error0(ty, value)
+        if fields is None:
+            fields = [(k, _compile_step(t, o)) for k, t, o in _field_options(ty, opts)]
+        for k, s in fields:
+            if k not in value:
+                if is_total:
+                    return error0(ty, value, [k])
                 continue
-        v = value[k]
-        err = check(v, ty)
+            v = value[k]
+            err = (yield s, v) if s.nested else s.fn(v)
+            if err is not None:
+                err.path.append(k)
+                return err
+        return None
+
+    return step_typeddict
+
+
+class _GraphMemo:
+    """(id, type) of dataclass instances which passed or are being checked in a call"""
+
+    def __init__(self):
+        self.seen: Set[Tuple[int, Any]] = set()
+        # `seen` in insertion order, to retract keys which depend on a failed instance
+        self.trail: List[Tuple[int, Any]] = []
+
+
+_graph_memo: "contextvars.ContextVar[_GraphMemo]" = contextvars.ContextVar("graph_memo")
+
+
+def _graph_root(check: Checker) -> Checker:
+    """Runs `check` with a memo of its own, which is dropped after the call"""
+
+    def check_graph_root(value: Any) -> Result:
+        token = _graph_memo.set(_GraphMemo())
+        try:
+            return check(value)
+        finally:
+            _graph_memo.reset(token)
+
+    return check_graph_root
+
+
+def _compile_graph(ty: Type[Any], check: Checker) -> Checker:
+    """Checks each instance of the dataclass `ty` once in a `_graph_root` call.
+
+    An instance which is being checked is assumed to pass when it is reached again through
+    a reference cycle. If it fails, the instances checked under that assumption are
+    forgotten, so that they are checked again if they are referenced elsewhere
+    (e.g. from another member of a `Union`).
+    """
+
+    def check_graph(value: Any) -> Result:
+        memo = _graph_memo.get()
+        key = (id(value), ty)
+        if key in memo.seen:
+            return None
+        mark = len(memo.trail)
+        memo.seen.add(key)
+        memo.trail.append(key)
+        err = check(value)
         if err is not None:
-            err.path.append(k)
-            return err
-    return None
+            memo.seen.difference_update(memo.trail[mark:])
+            del memo.trail[mark:]
+        return err
+
+    return check_graph
+
+
+def _compile_incremental(ty: Type[Any], check: Checker) -> Checker:
+    """Remembers the instances of the frozen dataclass `ty` which passed `check`, and skips them
+    in later calls.
+
+    Instances are only remembered if no value in them can change the result of `check`,
+    i.e. if `ty` has no field which contains `list`, `set`, `dict`, non-frozen dataclasses or
+    TypedDicts. Instances are held by weak references, so they are never kept alive,
+    and instances which don't support weak references are just checked every time.
+    `tuple` and `frozenset` values can't be weakly referenced, so they are walked again,
+    but frozen dataclasses in them are skipped.
+    """
+    stable: Optional[bool] = None
+    verified: Dict[int, "weakref.ref[Any]"] = {}
+
+    def check_incremental(value: Any) -> Result:
+        nonlocal stable
+        key = id(value)
+        ref = verified.get(key)
+        if ref is not None and ref() is value:
+            return None
+        err = check(value)
+        if err is None:
+            if stable is None:
+                stable = _is_stable(ty, set())
+            if stable:
+                try:
+                    verified[key] = weakref.ref(
+                        value, lambda _: verified.pop(key, None)
+                    )
+                except TypeError:
+                    pass
+        return err
+
+    return check_incremental
+
+
+def _is_stable(ty: Type[Any], seen: Set[Any]) -> bool:
+    """Returns False if the check result of `ty` values can change by mutating them"""
+    if ty in seen:
+        return True
+    if dataclasses.is_dataclass(ty):
+        if not ty.__dataclass_params__.frozen:  # type: ignore
+            return False
+        seen.add(ty)
+        return all(_is_stable(t, seen) for t in type_hints(ty).values())
+    elif is_typeddict(ty):
+        return False
+    to = get_origin(ty)
+    if to is None:
+        # plain classes are checked by `isinstance` only
+        return True
+    elif to is list or to is set or to is dict or to in SEQUENCE_ORIGINS:
+        # e.g. a `Sequence[int]` may be a list
+        return not get_args(ty)
+    elif to is tuple or to is frozenset or to is Union or is_pep604_union(to):
+        return all(_is_stable(t, seen) for t in get_args(ty) if t is not ...)
+    # other generics (e.g. `Literal`) don't look into mutable values
+    return True
 
 
 def is_typevar(ty: Type[Any]) -> TypeGuard[TypeVar]:
@@ -185,8 +1180,48 @@ def is_typeddict(ty: Type[Any]) -> TypeGuard[Type[TypedDict]]:  # type: ignore
     return False
 
 
-def check_root(value: Any):
-    """Check dataclass type recursively"""
-    err = check_dataclass(value, type(value))
+def check_root(
+    value: Any,
+    *,
+    incremental: bool = False,
+    max_errors: Optional[int] = 1,
+    iterative: bool = False,
+    graph: bool = False,
+):
+    """Check dataclass type recursively
+
+    With `incremental=True`, frozen dataclass instances which passed before are skipped
+    (see `_compile_incremental`).
+    With `iterative=True`, arbitrarily deep values can be checked (see `compile_check`).
+    With `graph=True`, shared dataclass instances are checked once, and reference cycles
+    are allowed (see `compile_check`).
+    If `max_errors` is not 1, the whole value is checked and up to `max_errors` errors
+    (all of them if None) are raised as an `AggregateError`.
+
+    >>> @dataclasses.dataclass
+    ... class Foo:
+    ...     a: int
+    ...     b: List[str]
+    >>> try:
+    ...     check_root(Foo("x", ["y", 1, 2]), max_errors=None)
+    ... except AggregateError as e:
+    ...     print([err.path for err in e.errors])
+    [['a'], ['b'], ['b']]
+    """
+    ty = type(value)
+    err: Result
+    if dataclasses.is_dataclass(ty):
+        checker = compile_check(
+            ty,
+            incremental=incremental,
+            max_errors=max_errors,
+            iterative=iterative,
+            graph=graph,
+        )
+        err = checker(value)
+    else:
+        err = Error0(ty, value)
     if err is not None:
+        if max_errors != 1 and not isinstance(err, AggregateError):
+            err = AggregateError(ty, value, [err])
         raise err
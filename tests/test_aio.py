@@ -0,0 +1,122 @@
+import asyncio
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set
+
+import pytest
+
+from dataclass_utils import check_type_async, into_async
+from dataclass_utils.error import Error
+
+
+@dataclasses.dataclass
+class Item:
+    a: int
+    next: Optional["Item"] = None
+
+
+@dataclasses.dataclass
+class Payload:
+    items: List[Item]
+
+
+@dataclasses.dataclass
+class Scalars:
+    floats: List[float]
+    rows: List[List[int]]
+    ids: Set[int]
+    seq: Sequence[float]
+    names: Dict[str, int]
+
+
+async def _count_ticks(coro):
+    """Runs `coro`, and returns its result and how many times another task ran meanwhile"""
+    ticks = 0
+    done = False
+
+    async def ticker():
+        nonlocal ticks
+        while not done:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        return await coro, ticks
+    finally:
+        done = True
+        await task
+
+
+def test_check_type_async():
+    payload = Payload([Item(i) for i in range(5000)])
+    _, ticks = asyncio.run(_count_ticks(check_type_async(payload, max_nodes=100)))
+    assert ticks >= 40
+
+    payload.items[4000].a = "x"  # type: ignore
+    with pytest.raises(Error) as e:
+        asyncio.run(check_type_async(payload))
+    assert e.value.path == ["a", "items"]
+    with pytest.raises(Error):
+        asyncio.run(check_type_async(1))
+
+
+def test_into_async():
+    data = {"items": [{"a": i} for i in range(5000)]}
+    ret, ticks = asyncio.run(_count_ticks(into_async(data, Payload, max_nodes=100)))
+    assert ret == Payload([Item(i) for i in range(5000)])
+    assert ticks >= 40
+
+    deep = None
+    for i in range(10000):
+        deep = {"a": i, "next": deep}
+    assert asyncio.run(into_async(deep, Item)).a == 9999
+
+    data["items"][10]["a"] = "x"
+    with pytest.raises(Error) as e:
+        asyncio.run(into_async(data, Payload))
+    assert e.value.path == ["a", "items"]
+
+
+def make_scalars(n: int) -> Scalars:
+    return Scalars(
+        [float(i) for i in range(n)],
+        [[i, i] for i in range(n)],
+        set(range(n)),
+        [float(i) for i in range(n)],
+        {str(i): i for i in range(n)},
+    )
+
+
+def test_scalar_containers():
+    # leaf containers are walked in slices, so the loop runs during the walk
+    scalars = make_scalars(20000)
+    check = check_type_async(scalars, max_nodes=1000, max_time=60)
+    _, ticks = asyncio.run(_count_ticks(check))
+    assert ticks >= 5 * 20
+    data = dataclasses.asdict(scalars)
+    convert = into_async(data, Scalars, max_nodes=1000, max_time=60)
+    ret, ticks = asyncio.run(_count_ticks(convert))
+    assert ret == scalars
+    assert ret.seq is data["seq"]
+    assert ticks >= 5 * 20
+
+    scalars.floats[15000] = "x"  # type: ignore
+    with pytest.raises(Error) as e:
+        asyncio.run(check_type_async(scalars, max_nodes=1000))
+    assert e.value.path == ["floats"]
+    data["names"]["15000"] = "x"
+    with pytest.raises(Error) as e:
+        asyncio.run(into_async(data, Scalars, max_nodes=1000))
+    assert e.value.path == ["15000", "names"]
+
+
+def test_offload():
+    data = {"items": [{"a": i} for i in range(10)]}
+    with ThreadPoolExecutor(1) as executor:
+        ret = asyncio.run(into_async(data, Payload, executor=executor, offload_size=5))
+        assert len(ret.items) == 10
+        asyncio.run(check_type_async(ret, executor=executor, offload_size=5))
+        ret.items[0].a = "x"  # type: ignore
+        with pytest.raises(Error):
+            asyncio.run(check_type_async(ret, executor=executor, offload_size=5))
@@ -0,0 +1,80 @@
+import dataclasses
+from typing import List
+
+import pytest
+
+from dataclass_utils import check_many, into_many, into_many_parallel
+from dataclass_utils.error import Error
+
+
+@dataclasses.dataclass
+class A:
+    a: int
+    b: List[str] = dataclasses.field(default_factory=list)
+
+
+DATA = [{"a": 1}, {"a": "x"}, {"a": 2, "b": ["y"]}, {"a": 3, "b": [1]}]
+
+
+def test_into_many_raise():
+    it = into_many(DATA, A)
+    assert next(it) == A(1)
+    with pytest.raises(Error) as e:
+        next(it)
+    assert e.value.index == 1
+    assert e.value.path == ["a"]
+
+
+def test_into_many_skip():
+    assert list(into_many(DATA, A, "skip")) == [A(1), A(2, ["y"])]
+
+
+def test_into_many_collect():
+    errors = []
+    assert list(into_many(DATA, A, "collect", errors)) == [A(1), A(2, ["y"])]
+    assert [e.index for e in errors] == [1, 3]
+    assert [e.path for e in errors] == [["a"], ["b"]]
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        into_many(DATA, A, "collect")
+    with pytest.raises(ValueError):
+        check_many([], "foo")  # type: ignore
+
+
+def test_check_many():
+    values = [A(1), A("x"), 1, A(2)]
+    with pytest.raises(Error) as e:
+        list(check_many(values))
+    assert e.value.index == 1
+    assert list(check_many(values, "skip")) == [A(1), A(2)]
+    errors = []
+    list(check_many(values, "collect", errors))
+    assert [e.index for e in errors] == [1, 2]
+
+
+def test_into_many_parallel():
+    data = DATA * 5
+    expected = list(into_many(data, A, "skip"))
+    assert (
+        list(into_many_parallel(data, A, "skip", chunksize=3, max_workers=2))
+        == expected
+    )
+    errors = []
+    list(into_many_parallel(data, A, "collect", errors, chunksize=3, max_workers=2))
+    assert [e.index for e in errors] == [i for i in range(len(data)) if i % 2 == 1]
+    assert all(e.path for e in errors)
+    with pytest.raises(Error) as e:
+        list(into_many_parallel(data, A, chunksize=3, max_workers=2))
+    assert e.value.index == 1
+    assert e.value.path == ["a"]
+
+
+def test_into_many_parallel_unpicklable():
+    @dataclasses.dataclass
+    class Local:
+        a: int
+
+    with pytest.raises(TypeError):
+        into_many_parallel([{"a": 1}], Local)
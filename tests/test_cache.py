@@ -0,0 +1,46 @@
+import dataclasses
+from typing import Dict, List
+
+import pytest
+
+import dataclass_utils
+from dataclass_utils import cache_info, clear_cache, set_cache_capacity
+from dataclass_utils.cache import DEFAULT_CAPACITY, LRUCache
+
+
+def test_lru_cache():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    with pytest.raises(KeyError):
+        cache.get("b")
+    assert cache.put("a", 10) == 1
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.size) == (1, 1, 1, 2)
+
+
+@dataclasses.dataclass
+class A:
+    a: List[int]
+
+
+def test_cache_api():
+    clear_cache()
+    try:
+        set_cache_capacity(1)
+        dataclass_utils.into({"a": [1]}, A)
+        dataclass_utils.check_type(A([1]))
+        info = cache_info()
+        assert info["check"].size == 1
+        assert info["check"].evictions > 0
+        assert info["into"].size == 1
+        assert info["type_hints"].size >= 1
+        with pytest.raises(ValueError):
+            set_cache_capacity(0)
+    finally:
+        set_cache_capacity(DEFAULT_CAPACITY)
+    clear_cache()
+    assert all(info.size == 0 for info in cache_info().values())
+    assert dataclass_utils.into({"a": [1]}, A) == A([1])
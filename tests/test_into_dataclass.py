@@ -1,12 +1,26 @@
-from dataclass_utils.error import Error, UnsupportedTypeError
+from dataclass_utils.error import AggregateError, Error, UnsupportedTypeError
+import ctypes
 import dataclasses
 import pytest
 from tests.utils import check_error
-from typing import Any, Generic, List, Optional, Set, Tuple, Type, TypeVar, Union
-
-from typing_extensions import Literal
-
-from dataclass_utils import check_type, into
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from typing_extensions import Literal, Protocol, TypedDict
+
+from dataclass_utils import check_type, compile_into, into
 
 
 def test0():
@@ -149,3 +163,291 @@ def test_typevar_class():
 def test_class():
     into(int, Type[int])
     into(None, None)
+
+
+def test_compile_into():
+    conv = compile_into(B)
+    assert conv is compile_into(B)
+    assert conv({"a": 1, "b": {"a": 2}}) == B(1, A(2))
+    err = conv({"a": 1, "b": {"a": "x"}})
+    assert isinstance(err, Error)
+    assert err.path == ["a", "b"]
+
+
+def test_compile_into_codegen():
+    conv = compile_into(B, codegen=True)
+    assert conv is compile_into(B, codegen=True)
+    assert conv is not compile_into(B)
+    assert conv({"a": 1, "b": {"a": 2, "b": ["x"]}}) == B(1, A(2, ["x"]))
+    # missing fields with defaults go through the generic path
+    assert conv({"a": 1, "b": {}}) == B(1, A())
+    for data in [
+        {"a": 1, "b": {"a": "x"}},
+        {"a": True, "b": {"a": 1, "b": [1]}},
+        {"a": 1, "b": {"c": 1}},
+        {"a": 1},
+        [],
+    ]:
+        expected = compile_into(B)(data)
+        err = conv(data)
+        assert isinstance(err, Error)
+        assert type(err) is type(expected)
+        assert err.path == expected.path
+
+
+def test_collect_errors():
+    data = {"a": "x", "b": {"a": "y", "b": [1, "z", 2], "c": 0}}
+    with pytest.raises(AggregateError) as e:
+        into(data, B, max_errors=None)
+    assert [err.path for err in e.value.errors] == [
+        ["a"],
+        ["a", "b"],
+        ["b", "b"],
+        ["b", "b"],
+        ["b"],
+    ]
+    with pytest.raises(AggregateError) as e:
+        into(data, B, max_errors=2)
+    assert len(e.value.errors) == 2
+    assert into({"a": 1, "b": {}}, B, max_errors=None) == B(1, A())
+    with pytest.raises(ValueError):
+        into({}, B, max_errors=0)
+
+
+@dataclasses.dataclass
+class Items:
+    seq: Sequence[int]
+    lst: List[int]
+
+
+def test_collect_sequence_errors():
+    data = {"seq": [1, "a", 2, "b"], "lst": [1, "a", 2, "b"]}
+    with pytest.raises(AggregateError) as e:
+        into(data, Items, max_errors=None)
+    assert [err.path for err in e.value.errors] == [["seq"]] * 2 + [["lst"]] * 2
+    seq = (1, 2)
+    assert into({"seq": seq, "lst": []}, Items, max_errors=None).seq is seq
+
+
+@dataclasses.dataclass
+class Created:
+    kind: Literal["created"]
+    id: int
+
+
+@dataclasses.dataclass
+class Deleted:
+    kind: Literal["deleted", "removed"]
+    id: int
+    reason: str = ""
+
+
+Event = Optional[Union[Created, Deleted]]
+
+
+def test_tagged_union():
+    assert into({"kind": "created", "id": 1}, Event) == Created("created", 1)
+    assert into({"kind": "removed", "id": 1}, Event) == Deleted("removed", 1)
+    assert into(None, Event) is None
+    # the error comes from the member the tag selects
+    with pytest.raises(Error) as e:
+        into({"kind": "deleted", "id": "x"}, Event)
+    assert e.value.path == ["id"]
+    with pytest.raises(Error) as e:
+        into({"kind": "updated", "id": 1}, Event)
+    assert e.value.path == ["kind"]
+    assert "created" in str(e.value)
+    with pytest.raises(Error):
+        into({"id": 1}, Event)
+    with pytest.raises(Error):
+        into({"kind": ["x"], "id": 1}, Event)
+
+
+def test_union_type_dispatch():
+    ty = Union[int, Set[int], Tuple[int, str], A, None, List[int]]
+    assert into(1, ty) == 1
+    assert into(True, ty) is True
+    assert into(None, ty) is None
+    assert into({"a": 1}, ty) == A(1)
+    assert into([1, 2], ty) == {1, 2}
+    assert into([1, "a"], ty) == (1, "a")
+    assert into((1, 2, 3), ty) == {1, 2, 3}
+    with check_error():
+        into(1.0, ty)
+
+
+def test_literal_bool_and_int():
+    assert into(1, Literal[1]) == 1
+    with check_error():
+        into(True, Literal[1])
+    with check_error():
+        into(0, Literal[False])
+    with check_error():
+        into([1], Literal[1])
+
+
+@dataclasses.dataclass
+class Node:
+    value: int
+    children: List["Node"] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class Derived(A):
+    c: Optional["Node"] = None
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_resolved_type_hints(codegen):
+    conv = compile_into(Node, codegen=codegen)
+    data = {"value": 1, "children": [{"value": 2, "children": []}]}
+    assert conv(data) == Node(1, [Node(2)])
+    conv = compile_into(Derived, codegen=codegen)
+    data = {"a": 1, "b": ["x"], "c": {"value": 3}}
+    assert conv(data) == Derived(1, ["x"], Node(3))
+    assert isinstance(conv({"a": "x"}), Error)
+
+
+@dataclasses.dataclass
+class AdoptItem:
+    a: int
+
+
+@dataclasses.dataclass
+class Adopt:
+    ints: List[int]
+    tags: Dict[str, Tuple[int, str]]
+    items: List[Optional[AdoptItem]]
+
+
+def test_into_adopt():
+    ints = [1, 2, 3]
+    tags = {"a": (1, "x")}
+    data = {"ints": ints, "tags": tags, "items": [None, {"a": 1}]}
+    ret = into(data, Adopt, adopt=True)
+    assert ret.ints is ints
+    assert ret.tags is tags
+    # converted items are copied
+    assert ret.items is not data["items"] and ret.items == [None, AdoptItem(1)]
+    assert data["items"][1] == {"a": 1}
+    assert into(data, Adopt) == ret
+    assert into(data, Adopt).ints is not ints
+
+    # other container types are converted
+    assert compile_into(Tuple[int, int], adopt=True)([1, 2]) == (1, 2)
+    assert compile_into(FrozenSet[int], adopt=True)([1]) == frozenset([1])
+    s = {1, 2}
+    assert compile_into(Set[int], adopt=True)(s) is s
+    assert isinstance(compile_into(List[int], adopt=True)([1, "a"]), Error)
+    err = compile_into(Dict[str, int], adopt=True)({"a": 1, "b": "x"})
+    assert isinstance(err, Error) and err.path == ["b"]
+
+
+class Pair(ctypes.Structure):
+    _fields_ = [("a", ctypes.c_int)]
+
+
+def test_into_buffers():
+    import array
+
+    floats = array.array("d", [1.0, 2.0])
+    assert into(floats, List[float]) == [1.0, 2.0]
+    assert into(memoryview(floats), Tuple[float, ...]) == (1.0, 2.0)
+    assert into(b"ab", List[int]) == [97, 98]
+    assert into(floats, Sequence[float]) is floats
+    assert into(floats, array.array) is floats
+    view = memoryview(floats)
+    assert into(view, Sequence[float]) is view
+    with pytest.raises(Error):
+        into(floats, List[int])
+    with pytest.raises(Error):
+        into(floats, Sequence[int])
+    # views which can't be iterated
+    square = memoryview(bytes(4)).cast("B", (2, 2))
+    structs = memoryview((Pair * 2)())
+    for view in [square, structs]:
+        for kls in [Sequence[int], List[int], Sequence[A0], List[A0]]:
+            with pytest.raises(Error):
+                into(view, kls)
+            assert isinstance(compile_into(kls, iterative=True)(view), Error)
+
+
+def test_into_sequence():
+
+    items = ({"a": 1},)
+    assert into(items, Sequence[AdoptItem]) == [AdoptItem(1)]
+    ints = (1, 2)
+    assert into(ints, Sequence[int]) is ints
+    with pytest.raises(Error):
+        into("ab", Sequence[int])
+    assert into([1, 2], Tuple[int, ...]) == (1, 2)
+
+
+@dataclasses.dataclass
+class Deep:
+    value: int
+    next: Optional["Deep"]
+    children: List["Deep"] = dataclasses.field(default_factory=list)
+    named: Dict[str, "Deep"] = dataclasses.field(default_factory=dict)
+    pair: Optional[Tuple[int, "Deep"]] = None
+
+
+def test_into_iterative():
+    from dataclass_utils.into_dataclass import into_root
+
+    data = None
+    for i in range(10000):
+        data = {"value": i, "next": data}
+    deep = into_root(data, Deep, iterative=True)
+    assert deep.value == 9999 and deep.next.value == 9998
+
+    converter = compile_into(Deep, iterative=True)
+    cases = [
+        {"value": 1, "next": {"value": "x", "next": None}},
+        {"value": 1, "next": None, "children": [{"value": 2, "next": None, "x": 1}]},
+        {
+            "value": 1,
+            "next": None,
+            "named": {"a": {"value": 2, "next": None, "named": {"b": 1}}},
+        },
+        {"value": 1, "next": None, "pair": [1, {"value": 2}]},
+        {
+            "value": 1,
+            "next": None,
+            "pair": [1, {"value": 2, "next": None}],
+            "children": [],
+        },
+        [1],
+    ]
+    for value in cases:
+        ret = converter(value)
+        expected = compile_into(Deep)(value)
+        if isinstance(expected, Error):
+            assert isinstance(ret, Error)
+            assert (ret.path, ret.ty, ret.value) == (
+                expected.path,
+                expected.ty,
+                expected.value,
+            )
+        else:
+            assert ret == expected
+
+    with pytest.raises(ValueError):
+        compile_into(Deep, iterative=True, max_errors=2)
+
+
+class UnionTD(TypedDict):
+    a: int
+
+
+class UnionProto(Protocol):
+    def f(self) -> int: ...
+
+
+def test_union_untestable_members():
+    # members which don't support `issubclass` are tried for any value
+    assert into(1, Union[UnionTD, int]) == 1
+    assert into(None, Optional[UnionTD]) is None
+    assert into("a", Union[UnionProto, str]) == "a"
+    with pytest.raises(Error):
+        into(1.0, Union[UnionTD, int])
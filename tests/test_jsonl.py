@@ -0,0 +1,58 @@
+import dataclasses
+import io
+from typing import List
+
+import pytest
+
+from dataclass_utils import loads_into, read_jsonl
+from dataclass_utils.error import AggregateError, Error, Error0
+
+
+@dataclasses.dataclass
+class A:
+    a: int
+    b: List[str] = dataclasses.field(default_factory=list)
+
+
+LINES = '{"a": 1}\n\n{"a": "x"}\n{"a": 2, "b": ["y"]}\nnot json\n'
+
+
+def test_read_jsonl_path(tmp_path):
+    path = tmp_path / "a.jsonl"
+    path.write_text('{"a": 1}\n{"a": 2, "b": ["y"]}')
+    assert list(read_jsonl(path, A)) == [A(1), A(2, ["y"])]
+    assert list(read_jsonl(str(path), A, buffer_size=1)) == [A(1), A(2, ["y"])]
+
+
+def test_read_jsonl_errors():
+    with pytest.raises(Error) as e:
+        list(read_jsonl(io.StringIO(LINES), A))
+    assert e.value.index == 3
+    assert e.value.path == ["a"]
+
+    errors = []
+    ret = list(read_jsonl(io.BytesIO(LINES.encode()), A, "collect", errors))
+    assert ret == [A(1), A(2, ["y"])]
+    assert [e.index for e in errors] == [3, 5]
+    assert errors[1].exception is not None
+
+
+@dataclasses.dataclass
+class Page:
+    items: List[A]
+    ids: List[int]
+
+
+def test_loads_into():
+    page = loads_into(b'{"items": [{"a": 1}], "ids": [1, 2]}', Page)
+    assert page == Page([A(1)], [1, 2])
+    assert loads_into("[1, 2]", List[int]) == [1, 2]
+    with pytest.raises(Error) as e:
+        loads_into('{"items": [{"a": 1}, {"a": "x"}], "ids": []}', Page)
+    assert e.value.path == ["a", "items"]
+    with pytest.raises(Error0) as e:
+        loads_into(b"{", Page)
+    assert e.value.exception is not None
+    with pytest.raises(AggregateError) as e:
+        loads_into('{"items": [{"a": "x"}], "ids": ["y"]}', Page, max_errors=None)
+    assert len(e.value.errors) == 2
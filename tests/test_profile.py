@@ -0,0 +1,94 @@
+import dataclasses
+from typing import List, Optional
+
+import pytest
+
+from dataclass_utils import check_type, compile_into, into, profile
+from dataclass_utils.type_checker import compile_check
+
+
+@dataclasses.dataclass
+class Item:
+    a: int
+    b: List[str]
+
+
+@dataclasses.dataclass
+class Root:
+    items: List[Item]
+    name: Optional[str]
+
+
+@pytest.fixture
+def profiling():
+    profile.reset()
+    profile.enable()
+    yield
+    profile.disable()
+    profile.reset()
+
+
+def test_profile_into(profiling):
+    into({"items": [{"a": 1, "b": ["x", "y"]}] * 3, "name": None}, Root)
+    stats = profile.snapshot()["into"]
+    assert stats["fields"]["Root.items"].calls == 1
+    assert stats["fields"]["Item.a"].calls == 3
+    assert stats["types"]["Item"].calls == 3
+    assert stats["types"]["str"].calls == 6
+    assert stats["fields"]["Root.items"].total_time >= stats["types"]["Item"].total_time
+
+
+def test_profile_check(profiling):
+    root = Root([Item(1, ["x"]), Item(2, [])], "a")
+    check_type(root)
+    stats = profile.snapshot()["check"]
+    assert stats["types"]["Root"].calls == 1
+    assert stats["fields"]["Item.b"].calls == 2
+    assert stats["types"]["str"].calls == 2
+    assert profile.snapshot()["into"] == {"types": {}, "fields": {}}
+
+
+def test_profile_codegen(profiling):
+    # generated dataclass checkers are replaced so that fields are recorded
+    compile_check(Item, codegen=True)(Item(1, ["x"]))
+    compile_into(Item, codegen=True)({"a": 1, "b": []})
+    assert profile.snapshot()["check"]["fields"]["Item.a"].calls == 1
+    assert profile.snapshot()["into"]["fields"]["Item.b"].calls == 1
+
+
+def test_profile_disabled():
+    profile.reset()
+    plain = compile_check(Item)
+    profile.enable()
+    try:
+        profiled = compile_check(Item)
+    finally:
+        profile.disable()
+    assert plain is not profiled
+    assert compile_check(Item) is plain
+    plain(Item(1, []))
+    assert profile.snapshot()["check"]["types"] == {}
+    profiled(Item(1, []))
+    assert profile.snapshot()["check"]["types"]["Item"].calls == 1
+    profile.reset()
+    assert profile.snapshot()["check"]["types"] == {}
+
+
+def test_profile_same_name(profiling):
+    # a class of another module with the same qualified name is recorded apart
+    @dataclasses.dataclass
+    class Other:
+        c: str
+
+    Other.__qualname__ = "Item"
+    Other.__module__ = "other"
+    into({"a": 1, "b": []}, Item)
+    into({"c": "x"}, Other)
+    stats = profile.snapshot()["into"]
+    assert stats["types"][f"{__name__}.Item"].calls == 1
+    assert stats["types"]["other.Item"].calls == 1
+    assert stats["fields"]["other.Item.c"].calls == 1
+    assert "Item" not in stats["types"]
+    profile.reset()
+    into({"c": "x"}, Other)
+    assert set(profile.snapshot()["into"]["types"]) == {"Item", "str"}
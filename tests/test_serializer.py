@@ -0,0 +1,155 @@
+import dataclasses
+import json
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from typing_extensions import Literal
+
+from dataclass_utils import compile_from, from_dataclass, into, iter_json
+
+
+@dataclasses.dataclass
+class Leaf:
+    kind: Literal["leaf"]
+    value: float
+
+
+@dataclasses.dataclass
+class Node:
+    kind: Literal["node"]
+    children: List[Union[Leaf, "Node"]]
+
+
+@dataclasses.dataclass
+class Record:
+    id: int
+    name: str
+    tags: FrozenSet[str]
+    pair: Tuple[int, str]
+    scores: Dict[str, List[float]]
+    ints: Tuple[int, ...]
+    by_id: Dict[int, Leaf]
+    tree: Optional[Node]
+    extra: Any
+    seq: Sequence[int]
+
+
+def make_record() -> Record:
+    tree = Node("node", [Leaf("leaf", 1.0), Node("node", [Leaf("leaf", 2.5)])])
+    return Record(
+        1,
+        "a",
+        frozenset(["x"]),
+        (1, "b"),
+        {"s": [1.0, 2.0]},
+        (1, 2),
+        {3: Leaf("leaf", 0.5)},
+        tree,
+        {"k": [1, (2, 3)]},
+        [1, 2],
+    )
+
+
+def test_from_dataclass():
+    record = make_record()
+    data = from_dataclass(record)
+    assert data == {
+        "id": 1,
+        "name": "a",
+        "tags": ["x"],
+        "pair": [1, "b"],
+        "scores": {"s": [1.0, 2.0]},
+        "ints": [1, 2],
+        "by_id": {3: {"kind": "leaf", "value": 0.5}},
+        "tree": {
+            "kind": "node",
+            "children": [
+                {"kind": "leaf", "value": 1.0},
+                {"kind": "node", "children": [{"kind": "leaf", "value": 2.5}]},
+            ],
+        },
+        "extra": {"k": [1, [2, 3]]},
+        "seq": [1, 2],
+    }
+    # nothing is shared but scalars
+    assert data["scores"]["s"] is not record.scores["s"]
+    assert data["seq"] is not record.seq
+    record.extra = {"k": [1, [2, 3]]}
+    assert into(data, Record) == record
+
+
+def test_compile_from():
+    assert compile_from(List[int]) is compile_from(List[int])
+    assert compile_from(Dict[str, int])({"a": 1}) == {"a": 1}
+    assert compile_from(Optional[Leaf])(None) is None
+    assert compile_from(Optional[Leaf])(Leaf("leaf", 1.0)) == {
+        "kind": "leaf",
+        "value": 1.0,
+    }
+
+
+def test_iter_json():
+    record = make_record()
+    chunks = list(iter_json(record))
+    assert len(chunks) > 1
+    assert "".join(chunks) == json.dumps(from_dataclass(record))
+    ints = list(range(3000))
+    assert "".join(iter_json(ints, List[int])) == json.dumps(ints)
+    assert "".join(iter_json([], List[int])) == "[]"
+    assert "".join(iter_json({}, Dict[str, Leaf])) == "{}"
+    leaves = [Leaf("leaf", float(i)) for i in range(3)]
+    assert (
+        into(json.loads("".join(iter_json(leaves, List[Leaf]))), List[Leaf]) == leaves
+    )
+
+
+@dataclasses.dataclass
+class Derived:
+    a: int
+    b: int = dataclasses.field(init=False)
+    count: ClassVar[int] = 0
+
+    def __post_init__(self) -> None:
+        self.b = self.a * 2
+
+
+@dataclasses.dataclass
+class Scaled:
+    a: int
+    scale: dataclasses.InitVar[int]
+
+    def __post_init__(self, scale: int) -> None:
+        self.a *= scale
+
+
+def test_non_init_fields():
+    value = Derived(2)
+    assert from_dataclass(value) == {"a": 2}
+    assert "".join(iter_json(value)) == '{"a": 2}'
+    assert into(from_dataclass(value), Derived) == value
+    # init-only variables are not stored
+    assert from_dataclass(Scaled(2, 3)) == {"a": 6}
+    assert "".join(iter_json(Scaled(2, 3))) == '{"a": 6}'
+
+
+@dataclasses.dataclass
+class Grid:
+    cells: Dict[Tuple[int, int], str]
+    groups: Dict[FrozenSet[str], int]
+    extra: Any
+
+
+def test_tuple_keys():
+    grid = Grid({(1, 2): "a"}, {frozenset(["x"]): 1}, {(1, (2, 3)): [4]})
+    data = from_dataclass(grid)
+    assert data == dataclasses.asdict(grid)
+    assert into(data, Grid) == grid
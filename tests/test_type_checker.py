@@ -1,11 +1,21 @@
+import ctypes
 import pytest
 import sys
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Callable, Dict, List, Optional, Set, Tuple
-from typing_extensions import TypedDict
-
-from dataclass_utils.type_checker import check, check_dataclass, is_error, is_typeddict
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+from typing_extensions import Literal, TypedDict
+
+from dataclass_utils.error import AggregateError
+from dataclass_utils.type_checker import (
+    ContainerPolicy,
+    check,
+    check_dataclass,
+    compile_check,
+    is_error,
+    is_typeddict,
+    set_container_policy,
+)
 
 
 def test_tuple():
@@ -154,3 +164,382 @@ if sys.version_info >= (3, 8, 0):
 
     def test_is_typeddict():
         assert is_typeddict(XTD)
+
+
+def test_compile_check_cached():
+    checker = compile_check(List[A])
+    assert checker is compile_check(List[A])
+    assert not is_error(checker([A(), A(c=B(b={"foo": 1}))]))
+    err = checker([A(c=B(b={"foo": "bar"}))])
+    assert is_error(err)
+    assert err.path == ["foo", "b", "c"]
+
+
+def test_compile_check_recursive():
+    checker = compile_check(TD)
+    assert checker is compile_check(TD)
+    assert not is_error(checker({"a": "foo", "b": 1, "c": None}))
+    assert is_error(checker({"a": "foo", "b": 1, "c": {"a": 1}}))
+
+
+def test_compile_check_codegen():
+    checker = compile_check(A, codegen=True)
+    assert checker is compile_check(A, codegen=True)
+    assert checker is not compile_check(A)
+    assert not is_error(checker(A(c=B(b={"foo": 1}))))
+    for value in [A(a=True), A(b=1), A(c=B(b={"foo": "bar"})), B(), 1]:
+        err = checker(value)
+        assert is_error(err)
+        assert err.path == compile_check(A)(value).path
+
+
+@dataclass
+class Empty:
+    a: Tuple[()]
+
+
+def test_empty_tuple():
+    assert not is_error(check((), Tuple[()]))
+    assert is_error(check((1,), Tuple[()]))
+    assert is_error(compile_check(Tuple[()], iterative=True)((1,)))
+    assert not is_error(check((1,), Tuple))
+    for kwargs in [{}, {"codegen": True}, {"iterative": True}]:
+        checker = compile_check(Empty, **kwargs)
+        assert not is_error(checker(Empty(())))
+        assert is_error(checker(Empty((1,))))  # type: ignore
+
+
+@dataclass
+class Sampled:
+    head: List[int] = field(
+        default_factory=list,
+        metadata={"container_policy": ContainerPolicy("head", 2)},
+    )
+    none: Dict[str, List[int]] = field(
+        default_factory=dict, metadata={"container_policy": ContainerPolicy("none")}
+    )
+    sample: Tuple[int, ...] = field(
+        default=(), metadata={"container_policy": ContainerPolicy("sample", 3)}
+    )
+    full: List[int] = field(default_factory=list)
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_container_policy(codegen):
+    checker = compile_check(Sampled, codegen=codegen)
+    assert not is_error(checker(Sampled(head=[1, 2, "a"], none={"a": ["b"]})))
+    assert is_error(checker(Sampled(head=[1, "a"])))
+    assert is_error(checker(Sampled(none=[])))
+    assert not is_error(checker(Sampled(sample=(1, 2, 3))))
+    assert is_error(checker(Sampled(sample=("a", "b", "c", "d"))))
+    assert is_error(checker(Sampled(full=[1, 2, "a"])))
+
+
+@dataclass
+class Nested:
+    inner: Sampled
+    items: List[int] = field(default_factory=list)
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_explicit_container_policy(codegen):
+    checker = compile_check(Nested, codegen=codegen, policy=ContainerPolicy("none"))
+    # fields without their own policy follow the explicit one, also in nested dataclasses
+    assert not is_error(checker(Nested(Sampled(full=[1, "a"]), [1, "a"])))  # type: ignore
+    # fields with their own policy keep it
+    assert is_error(checker(Nested(Sampled(head=["a"]))))  # type: ignore
+    default_checker = compile_check(Nested, codegen=codegen)
+    assert is_error(default_checker(Nested(Sampled(), ["a"])))  # type: ignore
+
+
+def test_set_container_policy():
+    try:
+        set_container_policy(ContainerPolicy("none"))
+        assert not is_error(check([1, "a"], List[int]))
+        assert not is_error(check((1, "a"), Tuple[int, ...]))
+    finally:
+        set_container_policy(ContainerPolicy())
+    assert is_error(check([1, "a"], List[int]))
+    with pytest.raises(ValueError):
+        ContainerPolicy("foo")  # type: ignore
+
+
+@dataclass(frozen=True)
+class Frozen:
+    a: int
+    b: Tuple[Optional["Frozen"], ...] = ()
+
+
+@dataclass(frozen=True)
+class FrozenWithList:
+    a: List[int]
+
+
+@dataclass(frozen=True)
+class FrozenWithSequence:
+    a: Sequence[int]
+
+
+def test_incremental():
+    checker = compile_check(Frozen, incremental=True)
+    inner = Frozen(1)
+    value = Frozen(2, (inner, None))
+    assert not is_error(checker(value))
+    # verified instances are skipped, so mutation behind the frozen interface is not seen
+    object.__setattr__(inner, "a", "x")
+    assert not is_error(checker(value))
+    assert not is_error(checker(Frozen(3, (inner,))))
+    assert is_error(compile_check(Frozen)(value))
+    assert is_error(checker(Frozen("y")))
+
+
+def test_incremental_mutable_field():
+    checker = compile_check(FrozenWithList, incremental=True)
+    value = FrozenWithList([1])
+    assert not is_error(checker(value))
+    value.a.append("x")
+    assert is_error(checker(value))
+    checker = compile_check(FrozenWithSequence, incremental=True)
+    value = FrozenWithSequence([1])
+    assert not is_error(checker(value))
+    value.a.append("x")  # type: ignore
+    assert is_error(checker(value))
+
+
+def test_collect_errors():
+    value = A(a="x", b=1, c=B(a="y", b={"k": "v", 1: 2}))
+    err = compile_check(A, max_errors=None)(value)
+    assert isinstance(err, AggregateError)
+    assert [e.path for e in err.errors] == [
+        ["a"],
+        ["b"],
+        ["a", "c"],
+        ["k", "b", "c"],
+        ["b", "c"],
+    ]
+    err = compile_check(A, max_errors=2)(value)
+    assert len(err.errors) == 2
+    assert compile_check(A, max_errors=None)(A()) is None
+    err = compile_check(TD, max_errors=None)({"a": 1, "c": None})
+    assert [e.path for e in err.errors] == [["a"], ["b"]]
+
+
+def test_union_member_errors_are_not_built():
+    from dataclass_utils.error import Error0, _FAILURE
+
+    err = check(A(c=B(b={"k": "v"})), Optional[Union[B, A]])
+    assert type(err) is Error0
+    assert err.path == []
+    assert _FAILURE.path == []
+
+
+@dataclass
+class Created:
+    kind: Literal["created"]
+    id: int
+
+
+@dataclass
+class Deleted:
+    kind: Literal["deleted"]
+    id: int
+
+
+def test_tagged_union():
+    ty = Optional[Union[Created, Deleted]]
+    assert not is_error(check(Created("created", 1), ty))
+    assert not is_error(check(None, ty))
+    err = check(Deleted("deleted", "x"), ty)
+    assert err.path == ["id"]
+    err = check(Deleted("updated", 1), ty)
+    assert err.path == ["kind"]
+    assert is_error(check(1, ty))
+
+
+class MyInt(int):
+    pass
+
+
+def test_union_type_dispatch():
+    ty = Union[int, str, None, List[int], Dict[str, int], B]
+    for value in [1, MyInt(1), "a", None, [1], {"a": 1}, B()]:
+        assert not is_error(check(value, ty))
+    for value in [True, 1.0, [1, "a"], {"a": "b"}, A(), (1,)]:
+        assert is_error(check(value, ty))
+
+
+def test_literal_bool_and_int():
+    assert not is_error(check(1, Literal[1, "a"]))
+    assert is_error(check(True, Literal[1, "a"]))
+    assert is_error(check(1, Literal[True]))
+    assert not is_error(check(True, Literal[True]))
+    assert is_error(check([1], Literal[1]))
+    codes = Literal[tuple(f"code{i}" for i in range(500))]  # type: ignore
+    assert not is_error(check("code499", codes))
+    assert is_error(check("code500", codes))
+
+
+def test_scalar_containers():
+    assert not is_error(check([1, MyInt(2), 3], List[int]))
+    err = check([1, 2, True, "a"], List[int])
+    assert is_error(err) and err.value is True
+    assert is_error(check([1.0, 2], List[float]))
+    assert not is_error(check({"a", "b"}, Set[str]))
+    assert not is_error(check((True, False), Tuple[bool, ...]))
+    assert is_error(check((True, 1), Tuple[bool, ...]))
+    assert not is_error(check([], List[int]))
+    # only the selected items are checked
+    policy = ContainerPolicy("head", 1)
+    assert not is_error(compile_check(List[int], policy=policy)([1, "a"]))
+
+
+class Pair(ctypes.Structure):
+    _fields_ = [("a", ctypes.c_int)]
+
+
+def test_buffers():
+    import array
+    from typing import Sequence
+
+    floats = array.array("d", [1.0, 2.0])
+    assert not is_error(check(floats, Sequence[float]))
+    assert is_error(check(floats, Sequence[int]))
+    assert is_error(check(floats, List[float]))
+    assert not is_error(check(memoryview(b"ab"), Sequence[int]))
+    assert not is_error(check(memoryview(floats), Sequence[float]))
+    assert is_error(check(memoryview(b"ab").cast("?"), Sequence[int]))
+    # views which can't be iterated
+    square = memoryview(bytes(4)).cast("B", (2, 2))
+    structs = memoryview((Pair * 2)())
+    for view in [square, structs]:
+        assert is_error(check(view, Sequence[int]))
+        assert is_error(compile_check(Sequence[int], max_errors=None)(view))
+        assert is_error(compile_check(Sequence[Frozen], iterative=True)(view))
+    assert not is_error(check(floats, array.array))
+    assert is_error(check([1, "a"], Sequence[int]))
+
+
+@dataclass
+class Linked:
+    value: int
+    next: Optional["Linked"]
+    children: List["Linked"] = field(default_factory=list)
+    named: Dict[str, "Linked"] = field(default_factory=dict)
+
+
+class LinkedTD(TypedDict):
+    node: Linked
+    pair: Tuple[int, Linked]
+
+
+def test_iterative():
+    from dataclass_utils.type_checker import check_root
+
+    node = None
+    for i in range(10000):
+        node = Linked(i, node)
+    check_root(node, iterative=True)
+
+    checker = compile_check(Linked, iterative=True)
+    cases = [
+        Linked(1, Linked("x", None)),
+        Linked(1, None, [Linked(2, None), Linked(3, None, [Linked(None, None)])]),
+        Linked(1, None, [], {"a": Linked(2, None, [], {"b": Linked("y", None)})}),
+        Linked(1, None, [], {"a": 1}),
+        Linked(1, None, [Linked(2, None)]),
+    ]
+    for value in cases:
+        err = checker(value)
+        expected = compile_check(Linked)(value)
+        assert (err is None) == (expected is None)
+        if expected is not None:
+            assert (err.path, err.ty, err.value) == (
+                expected.path,
+                expected.ty,
+                expected.value,
+            )
+
+    td_checker = compile_check(LinkedTD, iterative=True)
+    assert td_checker({"node": Linked(1, None), "pair": (1, Linked(2, None))}) is None
+    err = td_checker({"node": Linked(1, None), "pair": (1, Linked("x", None))})
+    assert err.path == ["value", "pair"]
+    assert td_checker({"node": Linked(1, None)}).path == ["pair"]
+
+    with pytest.raises(ValueError):
+        compile_check(Linked, iterative=True, max_errors=None)
+
+
+class _CountingMeta(type):
+    calls = 0
+
+    def __instancecheck__(cls, instance):
+        _CountingMeta.calls += 1
+        return super().__instancecheck__(instance)
+
+
+class Counted(metaclass=_CountingMeta):
+    pass
+
+
+class SubCounted(Counted):
+    # instances of the exact class are accepted without `__instancecheck__`
+    pass
+
+
+@dataclass
+class SharedConfig:
+    value: Counted
+
+
+@dataclass
+class GraphNode:
+    config: SharedConfig
+    peers: List["GraphNode"]
+    parent: Optional["GraphNode"] = None
+
+
+def test_graph():
+    from dataclass_utils.type_checker import check_root
+
+    config = SharedConfig(SubCounted())
+    root = GraphNode(config, [])
+    root.peers = [GraphNode(config, [root], root) for _ in range(100)]
+    root.peers[0].peers.append(root.peers[1])
+
+    _CountingMeta.calls = 0
+    check_root(root, graph=True)
+    assert _CountingMeta.calls == 1
+    # the memo is per call
+    check_root(root, graph=True)
+    assert _CountingMeta.calls == 2
+    with pytest.raises(RecursionError):
+        check_root(root)
+
+    root.peers[50].parent = GraphNode(SharedConfig("x"), [root])  # type: ignore
+    with pytest.raises(TypeError) as e:
+        check_root(root, graph=True)
+    assert e.value.path == ["parent", "peers"]
+    with pytest.raises(ValueError):
+        check_root(root, graph=True, iterative=True)
+
+
+@dataclass
+class CycleA:
+    b: "CycleB"
+    x: int
+
+
+@dataclass
+class CycleB:
+    a: CycleA
+
+
+def test_graph_retracts_failures():
+    a = CycleA(None, "x")  # type: ignore
+    b = CycleB(a)
+    a.b = b
+    # `b` passes only while `a` is assumed to pass through the cycle, so it is checked
+    # again after `a` fails in the union
+    checker = compile_check(Tuple[Union[CycleA, object], CycleB], graph=True)
+    err = checker((a, b))
+    assert is_error(err) and err.path == ["x", "a"]
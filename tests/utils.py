@@ -4,7 +4,6 @@ from dataclass_utils import check_type
 from contextlib import contextmanager
 import pytest
 
-
 T = TypeVar("T")
 
 